@@ -0,0 +1,35 @@
+"""book_tags foreign keys on delete cascade
+
+Revision ID: 0b6c28f4e913
+Revises: e7a15b3c9d60
+Create Date: 2026-10-16 21:20:05.913372
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b6c28f4e913'
+down_revision: Union[str, Sequence[str], None] = 'e7a15b3c9d60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _recreate_foreign_keys(ondelete) -> None:
+    op.drop_constraint('book_tags_book_id_fkey', 'book_tags', type_='foreignkey')
+    op.drop_constraint('book_tags_tag_id_fkey', 'book_tags', type_='foreignkey')
+    op.create_foreign_key('book_tags_book_id_fkey', 'book_tags', 'books', ['book_id'], ['bid'], ondelete=ondelete)
+    op.create_foreign_key('book_tags_tag_id_fkey', 'book_tags', 'tags', ['tag_id'], ['uid'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Books are deleted with a single DELETE ... RETURNING, so the database drops their tag links
+    _recreate_foreign_keys('CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _recreate_foreign_keys(None)
@@ -0,0 +1,46 @@
+"""unique case-insensitive tag names
+
+Revision ID: 1d6e8b3f0a47
+Revises: f3c7a2d95e10
+Create Date: 2026-10-16 23:52:08.173645
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1d6e8b3f0a47'
+down_revision: Union[str, Sequence[str], None] = 'f3c7a2d95e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tags whose names differ only by case are merged into the oldest of them
+DUPLICATE_TAGS = """
+    SELECT uid, first_value(uid) OVER (PARTITION BY lower(name) ORDER BY created_at, uid) AS keeper
+    FROM tags
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(f"""
+        INSERT INTO book_tags (book_id, tag_id)
+        SELECT book_tags.book_id, duplicates.keeper
+        FROM book_tags JOIN ({DUPLICATE_TAGS}) duplicates ON duplicates.uid = book_tags.tag_id
+        WHERE duplicates.uid <> duplicates.keeper
+        ON CONFLICT DO NOTHING
+    """)
+    # book_tags rows of the merged tags cascade
+    op.execute(f"""
+        DELETE FROM tags USING ({DUPLICATE_TAGS}) duplicates
+        WHERE tags.uid = duplicates.uid AND duplicates.uid <> duplicates.keeper
+    """)
+    op.create_index('uq_tags_lower_name', 'tags', [sa.text('lower(name)')], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_tags_lower_name', table_name='tags')
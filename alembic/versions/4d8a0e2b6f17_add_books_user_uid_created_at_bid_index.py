@@ -0,0 +1,27 @@
+"""add books user_uid created_at bid index
+
+Revision ID: 4d8a0e2b6f17
+Revises: 0b6c28f4e913
+Create Date: 2026-10-16 21:31:48.650127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d8a0e2b6f17'
+down_revision: Union[str, Sequence[str], None] = '0b6c28f4e913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_books_user_uid_created_at_bid', 'books', ['user_uid', 'created_at', 'bid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_user_uid_created_at_bid', table_name='books')
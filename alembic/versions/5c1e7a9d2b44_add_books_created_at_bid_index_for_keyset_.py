@@ -0,0 +1,27 @@
+"""add books created_at bid index for keyset pagination
+
+Revision ID: 5c1e7a9d2b44
+Revises: 41af09a4efe2
+Create Date: 2026-10-16 09:12:40.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e7a9d2b44'
+down_revision: Union[str, Sequence[str], None] = '41af09a4efe2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_books_created_at_bid', 'books', ['created_at', 'bid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_created_at_bid', table_name='books')
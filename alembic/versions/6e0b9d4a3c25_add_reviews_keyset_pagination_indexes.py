@@ -0,0 +1,29 @@
+"""add reviews keyset pagination indexes
+
+Revision ID: 6e0b9d4a3c25
+Revises: 9a2f5c7e1b84
+Create Date: 2026-10-16 22:03:41.552860
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e0b9d4a3c25'
+down_revision: Union[str, Sequence[str], None] = '9a2f5c7e1b84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_reviews_book_uid_created_at_uid', 'reviews', ['book_uid', 'created_at', 'uid'], unique=False)
+    op.create_index('ix_reviews_user_uid_created_at_uid', 'reviews', ['user_uid', 'created_at', 'uid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reviews_user_uid_created_at_uid', table_name='reviews')
+    op.drop_index('ix_reviews_book_uid_created_at_uid', table_name='reviews')
@@ -0,0 +1,27 @@
+"""add book_tags tag_id book_id index
+
+Revision ID: 7c4f1e9a2d58
+Revises: 1d6e8b3f0a47
+Create Date: 2026-10-16 23:58:37.519862
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4f1e9a2d58'
+down_revision: Union[str, Sequence[str], None] = '1d6e8b3f0a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_book_tags_tag_id_book_id', 'book_tags', ['tag_id', 'book_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_book_tags_tag_id_book_id', table_name='book_tags')
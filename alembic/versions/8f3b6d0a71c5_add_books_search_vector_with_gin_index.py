@@ -0,0 +1,38 @@
+"""add books search_vector generated column with gin index
+
+Revision ID: 8f3b6d0a71c5
+Revises: 5c1e7a9d2b44
+Create Date: 2026-10-16 11:04:52.530917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3b6d0a71c5'
+down_revision: Union[str, Sequence[str], None] = '5c1e7a9d2b44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(author, '') || ' ' || coalesce(publisher, ''))",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    op.create_index('ix_books_search_vector', 'books', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_search_vector', table_name='books', postgresql_using='gin')
+    op.drop_column('books', 'search_vector')
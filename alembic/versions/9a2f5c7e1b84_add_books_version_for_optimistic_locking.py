@@ -0,0 +1,28 @@
+"""add books version for optimistic locking
+
+Revision ID: 9a2f5c7e1b84
+Revises: 4d8a0e2b6f17
+Create Date: 2026-10-16 21:48:22.107539
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a2f5c7e1b84'
+down_revision: Union[str, Sequence[str], None] = '4d8a0e2b6f17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('books', 'version')
@@ -0,0 +1,55 @@
+"""add book_rating_stats rollup table
+
+Revision ID: b5e3a1f08c62
+Revises: 6e0b9d4a3c25
+Create Date: 2026-10-16 22:41:16.384920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e3a1f08c62'
+down_revision: Union[str, Sequence[str], None] = '6e0b9d4a3c25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'book_rating_stats',
+        sa.Column('book_uid', postgresql.UUID(as_uuid=True), nullable=False),
+        *(sa.Column(f'count_{stars}', sa.Integer(), server_default='0', nullable=False) for stars in range(1, 6)),
+        sa.Column('review_count', sa.Integer(),
+                  sa.Computed('count_1 + count_2 + count_3 + count_4 + count_5', persisted=True), nullable=True),
+        sa.Column('avg_rating', sa.Float(),
+                  sa.Computed('(count_1 + 2 * count_2 + 3 * count_3 + 4 * count_4 + 5 * count_5)::double precision'
+                              ' / NULLIF(count_1 + count_2 + count_3 + count_4 + count_5, 0)', persisted=True),
+                  nullable=True),
+        sa.Column('updated_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(['book_uid'], ['books.bid'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('book_uid'),
+    )
+    # One-off backfill; from here on every review write upserts the deltas
+    op.execute("""
+        INSERT INTO book_rating_stats (book_uid, count_1, count_2, count_3, count_4, count_5, updated_at)
+        SELECT book_uid,
+               count(*) FILTER (WHERE rating = 1),
+               count(*) FILTER (WHERE rating = 2),
+               count(*) FILTER (WHERE rating = 3),
+               count(*) FILTER (WHERE rating = 4),
+               count(*) FILTER (WHERE rating = 5),
+               now()
+        FROM reviews
+        WHERE book_uid IS NOT NULL
+        GROUP BY book_uid
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('book_rating_stats')
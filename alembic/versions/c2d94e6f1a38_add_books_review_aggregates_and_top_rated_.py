@@ -0,0 +1,56 @@
+"""add books review aggregates and top-rated index
+
+Revision ID: c2d94e6f1a38
+Revises: 8f3b6d0a71c5
+Create Date: 2026-10-16 20:45:12.204381
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2d94e6f1a38'
+down_revision: Union[str, Sequence[str], None] = '8f3b6d0a71c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column('review_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+    # One-off backfill from the existing reviews; from here on add_review_to_book keeps them in step
+    op.execute("""
+        UPDATE books
+        SET review_count = agg.review_count, rating_sum = agg.rating_sum
+        FROM (
+            SELECT book_uid, count(*) AS review_count, sum(rating) AS rating_sum
+            FROM reviews
+            WHERE book_uid IS NOT NULL
+            GROUP BY book_uid
+        ) AS agg
+        WHERE books.bid = agg.book_uid
+    """)
+    op.add_column('books', sa.Column(
+        'avg_rating',
+        sa.Float(),
+        sa.Computed("rating_sum::double precision / NULLIF(review_count, 0)", persisted=True),
+        nullable=True,
+    ))
+    op.create_index(
+        'ix_books_top_rated', 'books',
+        [sa.text('avg_rating DESC'), sa.text('review_count DESC'), sa.text('bid DESC')],
+        unique=False,
+        postgresql_where=sa.text('avg_rating IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_top_rated', table_name='books', postgresql_where=sa.text('avg_rating IS NOT NULL'))
+    op.drop_column('books', 'avg_rating')
+    op.drop_column('books', 'rating_sum')
+    op.drop_column('books', 'review_count')
@@ -0,0 +1,27 @@
+"""add reviews book_uid updated_at index
+
+Revision ID: d9e2a6c4b183
+Revises: 7c4f1e9a2d58
+Create Date: 2026-10-17 00:41:12.083519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9e2a6c4b183'
+down_revision: Union[str, Sequence[str], None] = '7c4f1e9a2d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_reviews_book_uid_updated_at', 'reviews', ['book_uid', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reviews_book_uid_updated_at', table_name='reviews')
@@ -0,0 +1,74 @@
+"""books published_date to date with filter indexes
+
+Revision ID: e7a15b3c9d60
+Revises: c2d94e6f1a38
+Create Date: 2026-10-16 21:02:37.718244
+
+"""
+import re
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a15b3c9d60'
+down_revision: Union[str, Sequence[str], None] = 'c2d94e6f1a38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FILTER_INDEXES = [
+    ('ix_books_author_published_date', ['author', 'published_date', 'bid']),
+    ('ix_books_publisher_published_date', ['publisher', 'published_date', 'bid']),
+    ('ix_books_language_created_at', ['language', 'created_at', 'bid']),
+    ('ix_books_rating_created_at', ['rating', 'created_at', 'bid']),
+    ('ix_books_published_date_bid', ['published_date', 'bid']),
+    ('ix_books_title_bid', ['title', 'bid']),
+]
+
+
+def _normalize(value: str) -> date:
+    """ Frozen copy of src.shared.utils.parse_published_date: YYYY-MM-DD, fixing day/month swaps """
+    match = re.match(r"^(\d{4})-(\d{1,2})-(\d{1,2})$", value.strip())
+    if not match:
+        raise ValueError(f"invalid date '{value}', expected YYYY-MM-DD")
+    year, month, day = (int(part) for part in match.groups())
+    if month > 12 >= day:
+        month, day = day, month
+    return date(year, month, day)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    connection = op.get_bind()
+    rows = connection.execute(sa.text("SELECT bid, published_date FROM books")).all()
+    invalid = []
+    for bid, published_date in rows:
+        try:
+            normalized = _normalize(published_date).isoformat()
+        except ValueError:
+            invalid.append(f"{bid}: {published_date!r}")
+            continue
+        if normalized != published_date:
+            connection.execute(sa.text("UPDATE books SET published_date = :value WHERE bid = :bid"),
+                               {"value": normalized, "bid": bid})
+    if invalid:
+        # Refuse to guess: fix these rows by hand and rerun the migration
+        raise RuntimeError("books.published_date values that cannot be read as dates:\n" + "\n".join(invalid))
+
+    op.alter_column('books', 'published_date',
+                    existing_type=sa.String(), type_=sa.Date(), existing_nullable=False,
+                    postgresql_using='published_date::date')
+    for name, columns in FILTER_INDEXES:
+        op.create_index(name, 'books', columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _ in reversed(FILTER_INDEXES):
+        op.drop_index(name, table_name='books')
+    op.alter_column('books', 'published_date',
+                    existing_type=sa.Date(), type_=sa.String(), existing_nullable=False,
+                    postgresql_using="to_char(published_date, 'YYYY-MM-DD')")
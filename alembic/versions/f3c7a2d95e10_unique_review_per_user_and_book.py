@@ -0,0 +1,67 @@
+"""unique review per user and book
+
+Revision ID: f3c7a2d95e10
+Revises: b5e3a1f08c62
+Create Date: 2026-10-16 23:18:52.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c7a2d95e10'
+down_revision: Union[str, Sequence[str], None] = 'b5e3a1f08c62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep each user's latest review of a book, the one the upsert would have left in place
+    op.execute("""
+        DELETE FROM reviews
+        WHERE uid IN (
+            SELECT uid FROM (
+                SELECT uid, row_number() OVER (
+                    PARTITION BY book_uid, user_uid ORDER BY created_at DESC, uid DESC
+                ) AS position
+                FROM reviews
+                WHERE book_uid IS NOT NULL AND user_uid IS NOT NULL
+            ) ranked
+            WHERE position > 1
+        )
+    """)
+    # Rebuild the rollups from the surviving reviews; aggregates do not bump version (If-Match stays valid)
+    op.execute("""
+        UPDATE books
+        SET review_count = totals.review_count, rating_sum = totals.rating_sum
+        FROM (
+            SELECT b.bid, count(r.uid) AS review_count, coalesce(sum(r.rating), 0) AS rating_sum
+            FROM books b LEFT JOIN reviews r ON r.book_uid = b.bid
+            GROUP BY b.bid
+        ) totals
+        WHERE books.bid = totals.bid
+          AND (books.review_count, books.rating_sum) IS DISTINCT FROM (totals.review_count, totals.rating_sum)
+    """)
+    op.execute("DELETE FROM book_rating_stats")
+    op.execute("""
+        INSERT INTO book_rating_stats (book_uid, count_1, count_2, count_3, count_4, count_5, updated_at)
+        SELECT book_uid,
+               count(*) FILTER (WHERE rating = 1),
+               count(*) FILTER (WHERE rating = 2),
+               count(*) FILTER (WHERE rating = 3),
+               count(*) FILTER (WHERE rating = 4),
+               count(*) FILTER (WHERE rating = 5),
+               now()
+        FROM reviews
+        WHERE book_uid IS NOT NULL
+        GROUP BY book_uid
+    """)
+    op.create_index('uq_reviews_book_uid_user_uid', 'reviews', ['book_uid', 'user_uid'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_reviews_book_uid_user_uid', table_name='reviews')
@@ -1,4 +1,4 @@
-from typing import TypeAlias, Annotated, Optional, Any
+from typing import TypeAlias, Annotated, Any
 
 from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer
@@ -10,8 +10,9 @@ from src.db.redis import redis_client
 from src.db.session import get_db_session
 from src.shared.exception_handlers import AccountNotVerified, InsufficientPermission
 from src.shared.utils import UserRole
+from src.user.cache import principal_cache
 from src.user.dependencies import get_user_service, UserServiceDep
-from src.user.models import UserModel
+from src.user.schemas import Principal
 from src.user.service import UserService
 
 
@@ -115,12 +116,19 @@ AuthServiceDep: TypeAlias = Annotated[AuthService, Depends(get_auth_service)]
 # Get Current User and Its Detail
 async def get_current_user(user_service: UserServiceDep,
                            token_payload: dict = AccessTokenDep
-                           ) -> Optional[UserModel]:
+                           ) -> Principal:
     user_data = token_payload.get("user")
     if not user_data or "email" not in user_data:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
 
-    user = await user_service.get_user_by_email(user_data["email"])
+    # Warm path: served by the principal cache without touching Postgres
+    user = await principal_cache.get(user_data["email"])
+    if user is None:
+        generation = await principal_cache.generation(user_data["email"])  # before the row is read
+        user_model = await user_service.get_user_by_email(user_data["email"])
+        if user_model is not None:
+            user = Principal.model_validate(user_model)
+            await principal_cache.set(user, generation)
     if not user or not user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User not found or inactive")
     return user
@@ -130,7 +138,7 @@ class RoleChecker:
     def __init__(self, allowed_roles: list[UserRole]):
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: UserModel = Depends(get_current_user)) -> bool:
+    def __call__(self, current_user: Principal = Depends(get_current_user)) -> bool:
         if not current_user.is_verified:
             raise AccountNotVerified(details={"user_email": current_user.email})
         if current_user.role in self.allowed_roles:
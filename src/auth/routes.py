@@ -1,4 +1,4 @@
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends
 
 from src.auth.dependencies import RefreshTokenDep, AccessTokenDep, AuthServiceDep, get_current_user, get_role_checker_dep
 from src.auth.schemas import MeResponse, TokenResponse, TokenPayload, EmailSchema, SignupResponse, PasswordResetRequest, \
@@ -6,9 +6,9 @@ from src.auth.schemas import MeResponse, TokenResponse, TokenPayload, EmailSchem
 from src.core.logger import logger
 from src.shared.exception_handlers import UserAlreadyExists, PasswordNotMatch
 from src.shared.utils import UserRole
+from src.user.cache import principal_cache
 from src.user.dependencies import UserServiceDep
-from src.user.models import UserModel
-from src.user.schemas import UserCreate, UserLogin
+from src.user.schemas import Principal, UserCreate, UserLogin
 from src.worker.celery_app_tasks import send_email_task
 
 auth_router = APIRouter()
@@ -90,8 +90,13 @@ async def revoke_all(auth_service: AuthServiceDep, token: TokenPayload = AccessT
 
 
 @auth_router.get("/me", response_model=MeResponse, dependencies=[role_checker_dep])
-async def get_me(user: UserModel = Depends(get_current_user)):
-    return MeResponse.from_user(user)
+async def get_me(user_service: UserServiceDep, user: Principal = Depends(get_current_user)):
+    profile = await user_service.get_user_profile(user.uid)
+    if not profile or not profile.is_active:
+        # The principal was served from the cache, but the user is gone or deactivated since
+        await principal_cache.invalidate(user.email)
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User not found or inactive")
+    return MeResponse.from_user(profile)
 
 
 @auth_router.post("/password-reset-request", status_code=status.HTTP_200_OK)
@@ -0,0 +1,113 @@
+import random
+import uuid
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from src.core.config import settings
+from src.core.logger import logger
+from src.db.redis import redis_client, RedisClient
+
+# Bump whenever the BookResponse shape or the cache entry layout changes so old entries are never served
+BOOK_CACHE_VERSION = 6
+
+
+class CachedBook(NamedTuple):
+    etag: str
+    last_modified: datetime
+    payload: str  # serialized BookResponse
+
+    def dumps(self) -> str:
+        return f"{self.etag}\n{self.last_modified.isoformat()}\n{self.payload}"
+
+    @classmethod
+    def loads(cls, raw: str) -> "CachedBook":
+        etag, last_modified, payload = raw.split("\n", 2)
+        return cls(etag, datetime.fromisoformat(last_modified), payload)
+
+
+class BookCache:
+    """ Read-through cache of serialized BookResponse payloads in Redis.
+        - entries carry the ETag / Last-Modified of the payload, so conditional GETs are answered from Redis
+        - keys are versioned: book:v{BOOK_CACHE_VERSION}:{book_id}
+        - TTLs are jittered to avoid synchronized expiry
+        - invalidate() bumps a per-book generation along with deleting the entry; set() only stores a
+          payload loaded at the current generation, so a load that raced a write cannot cache the old book
+        - Redis failures are logged and treated as misses, never as request errors
+    """
+
+    def __init__(self, client: RedisClient):
+        self.client = client
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def key(book_id: uuid.UUID | str) -> str:
+        return f"book:v{BOOK_CACHE_VERSION}:{book_id}"
+
+    @staticmethod
+    def generation_key(book_id: uuid.UUID | str) -> str:
+        return f"book:v{BOOK_CACHE_VERSION}:{book_id}:generation"
+
+    @staticmethod
+    def ttl() -> int:
+        jitter = settings.BOOK_CACHE_TTL * settings.BOOK_CACHE_TTL_JITTER
+        return max(1, int(settings.BOOK_CACHE_TTL + random.uniform(-jitter, jitter)))
+
+    async def get(self, book_id: uuid.UUID) -> Optional[CachedBook]:
+        try:
+            raw = await self.client.get_value(self.key(book_id))
+            entry = CachedBook.loads(raw) if raw is not None else None
+        except Exception as exc:
+            self.errors += 1
+            logger.warning(f"Book cache read failed for {book_id}: {exc}")
+            return None
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    async def generation(self, book_id: uuid.UUID) -> Optional[str]:
+        """ Read before loading the book from Postgres and pass to set(); None if Redis is unavailable """
+        try:
+            return await self.client.get_value(self.generation_key(book_id)) or ""
+        except Exception as exc:
+            self.errors += 1
+            logger.warning(f"Book cache generation read failed for {book_id}: {exc}")
+            return None
+
+    async def set(self, book_id: uuid.UUID, entry: CachedBook, generation: Optional[str]) -> None:
+        """ Cache a payload loaded after generation() returned `generation`; skipped if invalidated since """
+        if generation is None:
+            return
+        try:
+            await self.client.set_value_if(
+                self.key(book_id), entry.dumps(), self.ttl(), self.generation_key(book_id), generation)
+        except Exception as exc:
+            self.errors += 1
+            logger.warning(f"Book cache write failed for {book_id}: {exc}")
+
+    async def invalidate(self, *book_ids: uuid.UUID) -> None:
+        if not book_ids:
+            return
+        try:
+            await self.client.bump_and_delete(
+                [self.generation_key(book_id) for book_id in book_ids], settings.BOOK_CACHE_TTL,
+                *(self.key(book_id) for book_id in book_ids))
+        except Exception as exc:
+            self.errors += 1
+            logger.error(f"Book cache invalidation failed for {book_ids}: {exc}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Create global instance | counters are per worker process
+book_cache = BookCache(redis_client)
@@ -1,8 +1,9 @@
-from typing import Annotated, TypeAlias
+from typing import Annotated, Optional, TypeAlias
 
-from fastapi import Depends
+from fastapi import Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.books.schemas import BookFilter, BookTagFilter, TagMatch
 from src.books.service import BookService
 from src.db.session import get_db_session
 
@@ -16,3 +17,19 @@ async def get_book_service(db_session: AsyncSession = Depends(get_db_session)):
 
 
 BookServiceDep: TypeAlias = Annotated[BookService, Depends(get_book_service)]
+
+
+# The catalogue filters, read from the query string; BookFilter holds their bounds and range checks (422)
+BookFilterDep: TypeAlias = Annotated[BookFilter, Query()]
+
+
+def get_book_tag_filter(
+        tags: Optional[str] = Query(None, max_length=500, description="Comma-separated tag names"),
+        match: TagMatch = TagMatch.all,
+) -> BookTagFilter:
+    """ Dependency that reads ?tags=a,b&match=all|any """
+    names = [name.strip() for name in tags.split(",")] if tags else []
+    return BookTagFilter(tags=list(dict.fromkeys(name for name in names if name)), match=match)
+
+
+BookTagFilterDep: TypeAlias = Annotated[BookTagFilter, Depends(get_book_tag_filter)]
@@ -1,9 +1,9 @@
 import uuid
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from typing import Optional, TYPE_CHECKING, List
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID, TIMESTAMP
-from sqlalchemy import String, Integer, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, TIMESTAMP, TSVECTOR
+from sqlalchemy import String, Integer, Float, Date, ForeignKey, Index, Computed, func
 
 from src.db.base import Base
 
@@ -16,6 +16,21 @@ if TYPE_CHECKING:
 # ---------- Book Model ----------
 class BookModel(Base):
     __tablename__ = "books"
+    __table_args__ = (
+        # Keyset pagination of the catalogue: ORDER BY created_at DESC, bid DESC
+        Index("ix_books_created_at_bid", "created_at", "bid"),
+        # Full-text search: WHERE search_vector @@ websearch_to_tsquery(...)
+        Index("ix_books_search_vector", "search_vector", postgresql_using="gin"),
+        # Filtered / sorted listings: equality filter first, then the sort key and bid tiebreaker
+        Index("ix_books_author_published_date", "author", "published_date", "bid"),
+        Index("ix_books_publisher_published_date", "publisher", "published_date", "bid"),
+        Index("ix_books_language_created_at", "language", "created_at", "bid"),
+        Index("ix_books_rating_created_at", "rating", "created_at", "bid"),
+        Index("ix_books_published_date_bid", "published_date", "bid"),
+        Index("ix_books_title_bid", "title", "bid"),
+        # Books by submitter: WHERE user_uid = ? ORDER BY created_at DESC, bid DESC (also serves the count)
+        Index("ix_books_user_uid_created_at_bid", "user_uid", "created_at", "bid"),
+    )
 
     bid: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True, index=True
@@ -23,10 +38,17 @@ class BookModel(Base):
     title: Mapped[str] = mapped_column(String, nullable=False)
     author: Mapped[str] = mapped_column(String, nullable=False)
     publisher: Mapped[str] = mapped_column(String, nullable=False)
-    published_date: Mapped[str] = mapped_column(String, nullable=False)
+    published_date: Mapped[date] = mapped_column(Date, nullable=False)
     page_count: Mapped[int] = mapped_column(Integer, nullable=False)
     language: Mapped[str] = mapped_column(String, nullable=False)
     rating: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Review aggregates, maintained transactionally whenever a review is written
+    review_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    rating_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    avg_rating: Mapped[Optional[float]] = mapped_column(
+        Float,
+        Computed("rating_sum::double precision / NULLIF(review_count, 0)", persisted=True),
+    )
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True),
         default=lambda: datetime.now(timezone.utc))
@@ -37,25 +59,83 @@ class BookModel(Base):
     )
     user_uid: Mapped[Optional[uuid.UUID]] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.uid", ondelete="SET NULL"), nullable=True)
+    # Optimistic concurrency: bumped by every write to the row, checked against If-Match
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+    # Generated by Postgres from title/author/publisher; deferred so regular reads never fetch it
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(author, '') || ' ' || coalesce(publisher, ''))",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+
+    __mapper_args__ = {"version_id_col": version}
 
-    # Relationships
+    # Relationships | lazy="raise": queries state what they load, see the *_options() helpers in service.py
     user: Mapped[Optional["UserModel"]] = relationship(
         back_populates="books",
-        lazy="selectin"
+        lazy="raise"
     )
     reviews: Mapped[List["ReviewModel"]] = relationship(  # type: ignore[type-arg]
-        back_populates="book", lazy="selectin"
+        back_populates="book", lazy="raise"
     )
     tags: Mapped[List["TagModel"]] = relationship(
         secondary="book_tags",
         back_populates="books",
-        lazy="selectin",
+        lazy="raise",
     )
 
     def __repr__(self):
         return f"<Book {self.title} by {self.author}>"
 
 
+# Top-rated ranking: ORDER BY avg_rating DESC, review_count DESC, bid DESC is a plain index scan
+Index(
+    "ix_books_top_rated",
+    BookModel.avg_rating.desc(),
+    BookModel.review_count.desc(),
+    BookModel.bid.desc(),
+    postgresql_where=BookModel.avg_rating.isnot(None),
+)
 
 
+# ---------- Book Rating Stats (rollup) ----------
+RATING_VALUES = range(1, 6)
+
+
+class BookRatingStatsModel(Base):
+    """ Star histogram of a book's reviews, updated by upsert on every review write.
+        A book without reviews may have no row; read it as all zeros.
+    """
+    __tablename__ = "book_rating_stats"
+
+    book_uid: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("books.bid", ondelete="CASCADE"), primary_key=True)
+    count_1: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    count_2: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    count_3: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    count_4: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    count_5: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    review_count: Mapped[int] = mapped_column(
+        Integer, Computed("count_1 + count_2 + count_3 + count_4 + count_5", persisted=True))
+    avg_rating: Mapped[Optional[float]] = mapped_column(
+        Float,
+        Computed(
+            "(count_1 + 2 * count_2 + 3 * count_3 + 4 * count_4 + 5 * count_5)::double precision"
+            " / NULLIF(count_1 + count_2 + count_3 + count_4 + count_5, 0)",
+            persisted=True,
+        ),
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        onupdate=lambda: datetime.now(timezone.utc)
+    )
+
+    def __repr__(self):
+        return f"<BookRatingStats {self.book_uid}>"
 
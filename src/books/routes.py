@@ -1,35 +1,209 @@
+import csv
+import io
+import json
 import uuid
-from typing import List
-from fastapi import APIRouter, HTTPException, status
+from typing import Any, AsyncIterator, List, Optional, Sequence, Union
+from fastapi import APIRouter, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
 from src.auth.dependencies import AccessTokenDep, get_role_checker_dep
+from src.books.cache import book_cache
 from src.books.models import BookModel
-from src.books.dependencies import BookServiceDep
-from src.books.schemas import BookUpdate, BookResponse, BookCreate
+from src.books.dependencies import BookServiceDep, BookFilterDep, BookTagFilterDep
+from src.books.schemas import BookUpdate, BookResponse, BookCreate, BookSummary, BookView, ExportFormat, \
+    BookBulkResult, BookValidator, BookSort, BookBatchGet, BookRatingStats
+from src.books.service import BookService, book_etag
+from src.core.config import settings
 from src.core.logger import logger
-from src.shared.utils import UserRole
+from src.shared.utils import UserRole, CursorPage, conditional_headers, is_not_modified, if_match_versions
+from src.tags.dependencies import TagServiceDep
 
 role_checker_dep = get_role_checker_dep([UserRole.user, UserRole.admin, UserRole.superadmin])
+admin_checker_dep = get_role_checker_dep([UserRole.admin, UserRole.superadmin])
 book_router = APIRouter(dependencies=[role_checker_dep])
 
 
-@book_router.get("/", response_model=List[BookResponse], status_code=status.HTTP_200_OK)
+def _serialize_books(books: Sequence[BookModel], view: BookView) -> list:
+    """ Build the response items explicitly so the union response model keeps the requested view """
+    schema = BookSummary if view == BookView.summary else BookResponse
+    return [schema.model_validate(book) for book in books]
+
+
+def _book_page(books: Sequence[BookModel], next_cursor: Optional[str], view: BookView) -> CursorPage:
+    items = _serialize_books(books, view)
+    if view == BookView.summary:
+        return CursorPage[BookSummary](items=items, next_cursor=next_cursor)
+    return CursorPage[BookResponse](items=items, next_cursor=next_cursor)
+
+
+def _not_modified(etag: str, last_modified) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=conditional_headers(etag, last_modified))
+
+
+async def _load_if_modified(
+        request: Request, response: Response, service: BookService,
+        validators: Sequence[BookValidator], view: BookView,
+) -> Union[Response, List[BookModel]]:
+    """ Answer If-None-Match / If-Modified-Since from the page validators before any book
+        or relationship is loaded; otherwise load the books and set ETag / Last-Modified.
+    """
+    etag, last_modified = book_etag(validators, view)
+    if is_not_modified(request.headers, etag, last_modified):
+        return _not_modified(etag, last_modified)
+
+    books = await service.get_books_by_ids([validator.bid for validator in validators],
+                                           summary=view == BookView.summary)
+    # Derive the headers from what is actually sent, in case a book changed in between
+    etag, last_modified = book_etag([BookValidator.from_book(book, view) for book in books], view)
+    response.headers.update(conditional_headers(etag, last_modified))
+    return books
+
+
+async def _export_ndjson(books: AsyncIterator[BookModel]) -> AsyncIterator[str]:
+    async for book in books:
+        yield BookSummary.model_validate(book).model_dump_json() + "\n"
+
+
+async def _export_csv(books: AsyncIterator[BookModel]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(BookSummary.model_fields))
+    writer.writeheader()
+    async for book in books:
+        writer.writerow(BookSummary.model_validate(book).model_dump(mode="json"))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()  # header only when the catalogue is empty
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[str]:
+    """ Split a streamed NDJSON body into lines without buffering the whole payload """
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line.decode("utf-8")
+    if pending.strip():
+        yield pending.decode("utf-8")
+
+
+async def _json_items(items: List[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
+
+
+@book_router.get("/", response_model=Union[CursorPage[BookResponse], CursorPage[BookSummary]],
+                 status_code=status.HTTP_200_OK)
 async def get_all_books(
-        service: BookServiceDep
+        request: Request,
+        response: Response,
+        service: BookServiceDep,
+        filters: BookFilterDep,
+        tag_filter: BookTagFilterDep,
+        tag_service: TagServiceDep,
+        limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        view: BookView = BookView.full,
+        sort: BookSort = BookSort.newest,
 ):
-    book_list = await service.list_books()
-    logger.info(f"Found {len(book_list)} books")
-    if not book_list:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No books found")
-    return book_list
-
-
-@book_router.get("/user/{user_id}", response_model=List[BookResponse], status_code=status.HTTP_200_OK)
-async def get_books_by_user_submission(user_id: uuid.UUID, service: BookServiceDep):
-    books = await service.get_books_by_user(user_id)
-    if not books:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No books found")
-    return books
+    """ Catalogue page; ?tags=a,b&match=all|any keeps books carrying all / any of the named tags """
+    tag_ids = None
+    if tag_filter.tags:
+        tag_ids = list(dict.fromkeys((await tag_service.require_tag_ids(tag_filter.tags)).values()))
+    validators, next_cursor = await service.list_books(
+        limit=limit, cursor=cursor, summary=view == BookView.summary, filters=filters, sort=sort,
+        tag_ids=tag_ids, tag_match=tag_filter.match)
+    logger.info(f"Found {len(validators)} books")
+    if not validators:  # no match or past the last page: an empty page, not a missing resource
+        return _book_page([], None, view)
+    book_list = await _load_if_modified(request, response, service, validators, view)
+    if isinstance(book_list, Response):
+        return book_list
+    return _book_page(book_list, next_cursor, view)
+
+
+@book_router.get("/search", response_model=Union[CursorPage[BookResponse], CursorPage[BookSummary]],
+                 status_code=status.HTTP_200_OK)
+async def search_books(
+        request: Request,
+        response: Response,
+        service: BookServiceDep,
+        q: str = Query(..., min_length=1, max_length=200),
+        limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        view: BookView = BookView.full,
+):
+    validators, next_cursor = await service.search_books(
+        q, limit=limit, cursor=cursor, summary=view == BookView.summary)
+    if not validators:
+        return _book_page([], None, view)
+    books = await _load_if_modified(request, response, service, validators, view)
+    if isinstance(books, Response):
+        return books
+    return _book_page(books, next_cursor, view)
+
+
+@book_router.get("/top-rated", response_model=Union[CursorPage[BookResponse], CursorPage[BookSummary]],
+                 status_code=status.HTTP_200_OK)
+async def get_top_rated_books(
+        request: Request,
+        response: Response,
+        service: BookServiceDep,
+        limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        min_reviews: int = Query(1, ge=1),
+        view: BookView = BookView.full,
+):
+    validators, next_cursor = await service.top_rated_books(
+        limit=limit, cursor=cursor, min_reviews=min_reviews, summary=view == BookView.summary)
+    if not validators:
+        return _book_page([], None, view)
+    books = await _load_if_modified(request, response, service, validators, view)
+    if isinstance(books, Response):
+        return books
+    return _book_page(books, next_cursor, view)
+
+
+@book_router.get("/export", response_class=StreamingResponse, status_code=status.HTTP_200_OK)
+async def export_books(service: BookServiceDep, export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format")):
+    books = service.stream_books(batch_size=settings.EXPORT_BATCH_SIZE)
+    if export_format == ExportFormat.csv:
+        content, media_type = _export_csv(books), "text/csv"
+    else:
+        content, media_type = _export_ndjson(books), "application/x-ndjson"
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="books.{export_format.value}"'},
+    )
+
+
+@book_router.get("/user/{user_id}", response_model=Union[CursorPage[BookResponse], CursorPage[BookSummary]],
+                 status_code=status.HTTP_200_OK)
+async def get_books_by_user_submission(
+        request: Request,
+        response: Response,
+        user_id: uuid.UUID,
+        service: BookServiceDep,
+        limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        view: BookView = BookView.full,
+):
+    validators, next_cursor = await service.get_books_by_user(
+        user_id, limit=limit, cursor=cursor, summary=view == BookView.summary)
+    if not validators:
+        return _book_page([], None, view)
+    books = await _load_if_modified(request, response, service, validators, view)
+    if isinstance(books, Response):
+        return books
+    return _book_page(books, next_cursor, view)
+
+
+@book_router.get("/user/{user_id}/count", status_code=status.HTTP_200_OK)
+async def count_books_by_user_submission(user_id: uuid.UUID, service: BookServiceDep) -> dict:
+    return {"user_id": user_id, "count": await service.count_books_by_user(user_id)}
 
 
 
@@ -43,33 +217,110 @@ async def create_a_book(
     return await service.create_book(book_data, user_uid)
 
 
+@book_router.post("/bulk", response_model=BookBulkResult, status_code=status.HTTP_200_OK)
+async def bulk_create_books(
+        request: Request,
+        service: BookServiceDep,
+        token_payload=AccessTokenDep,
+):
+    """ Ingest many books at once.
+        - body: a JSON array of BookCreate items, or an NDJSON stream (Content-Type: application/x-ndjson)
+        - returns: created bids plus per-item validation/database errors by index
+    """
+    user_uid = token_payload.get("user")['uid']
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        items = _ndjson_lines(request)
+    else:
+        try:
+            payload = await request.json()
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail="Body is not valid JSON")
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                                detail="Expected a JSON array of books")
+        items = _json_items(payload)
+    return await service.bulk_create_books(items, user_uid, batch_size=settings.BULK_INSERT_BATCH_SIZE)
+
+
+@book_router.post("/batch-get", response_model=Union[List[Optional[BookResponse]], List[Optional[BookSummary]]],
+                  status_code=status.HTTP_200_OK)
+async def batch_get_books(
+        batch: BookBatchGet,
+        service: BookServiceDep,
+        view: BookView = BookView.full,
+):
+    """ Fetch many books in one query, in the order requested; unknown ids come back as null """
+    books = await service.get_books_by_ids(batch.ids, summary=view == BookView.summary)
+    found = dict(zip((book.bid for book in books), _serialize_books(books, view)))
+    return [found.get(book_id) for book_id in batch.ids]
+
+
+@book_router.get("/cache/stats", dependencies=[admin_checker_dep], status_code=status.HTTP_200_OK)
+async def get_book_cache_stats() -> dict:
+    return book_cache.stats()
+
+
 @book_router.get("/{book_id}", response_model=BookResponse, status_code=status.HTTP_200_OK)
 async def get_a_book(
+        request: Request,
         service: BookServiceDep,
         book_id: uuid.UUID,
-) -> BookModel:
-    book = await service.get_book(book_id)
-    if not book:
-        raise HTTPException(status_code=404, detail="Book not found")
-    return book
+) -> Response:
+    entry = await service.get_cached_book(book_id)
+    if entry is None:
+        # Cache miss: decide the 304 from one aggregate query before loading relationships
+        validator = await service.get_book_validator(book_id)
+        if not validator:
+            raise HTTPException(status_code=404, detail="Book not found")
+        etag, last_modified = book_etag([validator], BookView.full, version=validator.version)
+        if is_not_modified(request.headers, etag, last_modified):
+            return _not_modified(etag, last_modified)
+        entry = await service.load_book(book_id)
+        if not entry:
+            raise HTTPException(status_code=404, detail="Book not found")
+
+    if is_not_modified(request.headers, entry.etag, entry.last_modified):
+        return _not_modified(entry.etag, entry.last_modified)
+    # Payload is already a serialized BookResponse (possibly straight from Redis)
+    return Response(content=entry.payload, media_type="application/json",
+                    headers=conditional_headers(entry.etag, entry.last_modified))
+
+
+@book_router.get("/{book_id}/stats", response_model=BookRatingStats, status_code=status.HTTP_200_OK)
+async def get_book_rating_stats(service: BookServiceDep, book_id: uuid.UUID) -> BookRatingStats:
+    stats = await service.get_rating_stats(book_id)
+    if not stats:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
+    return stats
 
 
 @book_router.patch("/{book_id}", response_model=BookUpdate)
 async def update_a_book(
+        request: Request,
+        response: Response,
         book_update_data: BookUpdate,
         service: BookServiceDep,
         book_id: uuid.UUID,
 ) -> BookModel:
-    book_to_updated = await service.update_book(book_id, book_update_data)
+    """ Send the book's ETag in If-Match to reject the update with 412 if someone else changed it first.
+        The response carries the new ETag, so conditional updates can be chained without a GET.
+    """
+    book_to_updated = await service.update_book(
+        book_id, book_update_data, expected_versions=if_match_versions(request.headers))
     if not book_to_updated:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
+    # The full-view ETag also covers reviews and tags, which the RETURNING row does not carry
+    validator = await service.get_book_validator(book_id)
+    etag, last_modified = book_etag([validator], BookView.full, version=book_to_updated.version)
+    response.headers.update(conditional_headers(etag, last_modified))
     return book_to_updated
 
 
 @book_router.delete("/{book_id}", status_code=status.HTTP_200_OK)
 async def delete_a_book(
+        request: Request,
         service: BookServiceDep,
         book_id: uuid.UUID,
 ) -> dict:
-    result = await service.delete_book(book_id)
+    result = await service.delete_book(book_id, expected_versions=if_match_versions(request.headers))
     return {"success": result, "message": "Book deleted successfully"}
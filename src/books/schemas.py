@@ -1,21 +1,81 @@
-from pydantic import BaseModel, Field, ConfigDict
-from datetime import datetime
-from typing import Optional, List
+from enum import Enum
+from pydantic import BaseModel, Field, ConfigDict, field_validator, model_validator
+from datetime import date, datetime
+from typing import Any, Dict, Optional, List
 import uuid
 
+from src.core.config import settings
 from src.reviews.schemas import ReviewResponse
+from src.shared.utils import parse_published_date
 from src.tags.schemas import TagResponse
 
 
+class BookView(str, Enum):
+    full = "full"  # book with nested reviews and tags
+    summary = "summary"  # book columns only, no relationship loading
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class BookSort(str, Enum):
+    # a leading "-" sorts descending; ties are broken by bid in the same direction
+    newest = "-created_at"
+    oldest = "created_at"
+    published_desc = "-published_date"
+    published_asc = "published_date"
+    rating_desc = "-rating"
+    rating_asc = "rating"
+    title_asc = "title"
+    title_desc = "-title"
+
+
+class TagMatch(str, Enum):
+    all = "all"  # books carrying every requested tag
+    any = "any"  # books carrying at least one of them
+
+
+class BookTagFilter(BaseModel):
+    """ Tag filter of the catalogue: tag names, matched case-insensitively, and how to combine them """
+    tags: List[str] = []
+    match: TagMatch = TagMatch.all
+
+
+class BookFilter(BaseModel):
+    """ Optional catalogue filters, read from the query string; an inverted range is a 422, not an empty page """
+    author: Optional[str] = None
+    language: Optional[str] = None
+    publisher: Optional[str] = None
+    published_from: Optional[date] = None  # inclusive
+    published_to: Optional[date] = None  # inclusive
+    min_rating: Optional[int] = Field(None, ge=1, le=5)
+    max_rating: Optional[int] = Field(None, ge=1, le=5)
+
+    @model_validator(mode="after")
+    def check_ranges(self) -> "BookFilter":
+        if self.published_from and self.published_to and self.published_from > self.published_to:
+            raise ValueError("published_from must not be after published_to")
+        if self.min_rating is not None and self.max_rating is not None and self.min_rating > self.max_rating:
+            raise ValueError("min_rating must not be greater than max_rating")
+        return self
+
+
 class BookBase(BaseModel):
     title: str = Field(min_length=3)
     author: str = Field(min_length=3)
     publisher: str
-    published_date: str
+    published_date: date
     page_count: int
     language: str
     rating: int = Field(gt=0, lt=6)
 
+    @field_validator("published_date", mode="before")
+    @classmethod
+    def normalize_published_date(cls, value):
+        return parse_published_date(value)
+
     model_config = ConfigDict(
         from_attributes=True,  # replaces orm_mode=True
         json_schema_extra={
@@ -52,9 +112,83 @@ class BookResponse(BookBase):
     bid: uuid.UUID
     created_at: datetime
     updated_at: datetime
+    review_count: int = 0
+    avg_rating: Optional[float] = None
     reviews: List[ReviewResponse]
     tags: List[TagResponse]
 
     model_config = ConfigDict(
         from_attributes=True
     )
+
+
+class BookSummary(BookBase):
+    bid: uuid.UUID
+    created_at: datetime
+    updated_at: datetime
+    review_count: int = 0
+    avg_rating: Optional[float] = None
+
+    model_config = ConfigDict(
+        from_attributes=True
+    )
+
+
+class BookValidator(BaseModel):
+    """ The state a book representation is derived from, used for ETag / Last-Modified.
+        Loaded either from a cheap column/aggregate query or from an already loaded book.
+    """
+    bid: uuid.UUID
+    updated_at: datetime
+    version: int = 1
+    review_count: int = 0
+    reviews_updated_at: Optional[datetime] = None
+    tag_ids: List[uuid.UUID] = []
+    tag_names: List[str] = []  # ordered like tag_ids
+
+    @classmethod
+    def from_book(cls, book, view: BookView = BookView.full) -> "BookValidator":
+        if view == BookView.summary:
+            return cls(bid=book.bid, updated_at=book.updated_at, version=book.version)
+        tags = sorted(book.tags, key=lambda tag: tag.uid)
+        return cls(
+            bid=book.bid,
+            updated_at=book.updated_at,
+            version=book.version,
+            review_count=book.review_count,
+            reviews_updated_at=max((review.updated_at for review in book.reviews), default=None),
+            tag_ids=[tag.uid for tag in tags],
+            tag_names=[tag.name for tag in tags],
+        )
+
+    def version_key(self, view: BookView = BookView.full) -> tuple:
+        """ Values an ETag must change with; summaries do not embed reviews or tags """
+        if view == BookView.summary:
+            return self.bid, self.updated_at, self.version
+        return self.bid, self.updated_at, self.version, self.review_count, self.reviews_updated_at, *self.tag_ids, *self.tag_names
+
+    @property
+    def last_modified(self) -> datetime:
+        return max(filter(None, (self.updated_at, self.reviews_updated_at)))
+
+
+class BookRatingStats(BaseModel):
+    book_uid: uuid.UUID
+    review_count: int = 0
+    avg_rating: Optional[float] = None
+    histogram: Dict[int, int]  # stars (1-5) -> number of reviews
+
+
+class BookBatchGet(BaseModel):
+    ids: List[uuid.UUID] = Field(min_length=1, max_length=settings.MAX_PAGE_SIZE)
+
+
+class BookBulkError(BaseModel):
+    index: int  # position of the item in the submitted array / NDJSON stream
+    errors: List[Dict[str, Any]]
+
+
+class BookBulkResult(BaseModel):
+    created: int = 0
+    bids: List[uuid.UUID] = []
+    errors: List[BookBulkError] = []
@@ -1,11 +1,186 @@
-from typing import Optional, Sequence
-from sqlalchemy import select
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+from pydantic import ValidationError
+from sqlalchemy import select, tuple_, insert, update, delete, func, Float, Select, intersect, union
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, raiseload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 import uuid
 
-from src.books.models import BookModel
-from src.books.schemas import BookCreate, BookUpdate
-from src.shared.exception_handlers import BookNotFound
+from src.books.cache import book_cache, CachedBook
+from src.books.models import BookModel, BookRatingStatsModel, RATING_VALUES
+from src.books.schemas import BookCreate, BookUpdate, BookBulkError, BookBulkResult, BookResponse, BookValidator, \
+    BookView, BookFilter, BookSort, BookRatingStats, TagMatch
+from src.core.config import settings
+from src.core.logger import logger
+from src.db.session import after_commit
+from src.reviews.models import ReviewModel
+from src.shared.exception_handlers import BookNotFound, InvalidCursor, PreconditionFailed
+from src.shared.utils import decode_cursor, split_page, make_etag
+from src.tags.cache import tag_facet_cache
+from src.tags.models import BookTagModel, TagModel
+
+
+# Sortable listing keys: column plus the parser that reads it back from a cursor
+BOOK_SORT_COLUMNS: Dict[str, Tuple[Any, Callable[[str], Any]]] = {
+    "created_at": (BookModel.created_at, datetime.fromisoformat),
+    "published_date": (BookModel.published_date, date.fromisoformat),
+    "rating": (BookModel.rating, int),
+    "title": (BookModel.title, str),
+}
+
+
+def apply_book_filters(stmt: Select, filters: Optional[BookFilter]) -> Select:
+    """ Add the WHERE clauses of the set filters; equality filters lead the composite indexes """
+    if not filters:
+        return stmt
+    if filters.author is not None:
+        stmt = stmt.where(BookModel.author == filters.author)
+    if filters.language is not None:
+        stmt = stmt.where(BookModel.language == filters.language)
+    if filters.publisher is not None:
+        stmt = stmt.where(BookModel.publisher == filters.publisher)
+    if filters.published_from is not None:
+        stmt = stmt.where(BookModel.published_date >= filters.published_from)
+    if filters.published_to is not None:
+        stmt = stmt.where(BookModel.published_date <= filters.published_to)
+    if filters.min_rating is not None:
+        stmt = stmt.where(BookModel.rating >= filters.min_rating)
+    if filters.max_rating is not None:
+        stmt = stmt.where(BookModel.rating <= filters.max_rating)
+    return stmt
+
+
+def books_with_tags(tag_ids: Sequence[uuid.UUID], match: TagMatch = TagMatch.all):
+    """ Book ids carrying all (INTERSECT) or any (UNION) of the tags. Each branch is an index-only
+        scan of ix_book_tags_tag_id_book_id, so the cost follows the tags' sizes, not the catalogue's.
+    """
+    branches = [select(BookTagModel.book_id).where(BookTagModel.tag_id == tag_id) for tag_id in tag_ids]
+    if len(branches) == 1:
+        return branches[0]
+    return intersect(*branches) if match == TagMatch.all else union(*branches)
+
+
+def rating_stats_upsert(histograms: Dict[uuid.UUID, Dict[int, int]]):
+    """ One INSERT ... ON CONFLICT DO UPDATE adding per-star deltas to the book_rating_stats rows of many books.
+        - histograms: book_uid -> {stars: delta}, e.g. {bid: {4: -1, 5: +1}} when a review goes from 4 to 5 stars
+    """
+    stmt = pg_insert(BookRatingStatsModel).values([
+        {"book_uid": book_uid, **{f"count_{stars}": deltas.get(stars, 0) for stars in RATING_VALUES}}
+        for book_uid, deltas in histograms.items()
+    ])
+    counts = {
+        f"count_{stars}": getattr(BookRatingStatsModel, f"count_{stars}") + getattr(stmt.excluded, f"count_{stars}")
+        for stars in RATING_VALUES
+    }
+    return stmt.on_conflict_do_update(
+        index_elements=[BookRatingStatsModel.book_uid],
+        set_={**counts, "updated_at": func.now()},
+    )
+
+
+def book_summary_options() -> tuple:
+    """ Column-only projection for summary listings: skips the reviews/tags/user selectin round trips.
+        Built on call so mappers are configured only once every model module is imported.
+    """
+    return (
+        load_only(
+            BookModel.bid, BookModel.title, BookModel.author, BookModel.publisher, BookModel.published_date,
+            BookModel.page_count, BookModel.language, BookModel.rating, BookModel.review_count, BookModel.avg_rating,
+            BookModel.created_at, BookModel.updated_at, BookModel.version,
+        ),
+        raiseload(BookModel.reviews),
+        raiseload(BookModel.tags),
+        raiseload(BookModel.user),
+    )
+
+
+def book_detail_options() -> tuple:
+    """ Loader options for the full BookResponse: one selectin pass each for reviews and tags.
+        Nested relationships (a review's book and user, a tag's books) stay unloaded.
+    """
+    return selectinload(BookModel.reviews), selectinload(BookModel.tags), raiseload(BookModel.user)
+
+
+def book_write_options() -> tuple:
+    """ Loader options for INSERT/UPDATE ... RETURNING: every column, no relationship round trips.
+        A new book has no reviews or tags, and write responses do not embed them for existing ones.
+    """
+    return raiseload(BookModel.reviews), raiseload(BookModel.tags), raiseload(BookModel.user)
+
+
+def book_validator_columns(summary: bool = False) -> list:
+    """ Columns a BookValidator is built from. The full view adds correlated aggregates over
+        reviews and book_tags, so no relationship is loaded to decide a conditional request.
+        All are answered from indexes (ix_reviews_book_uid_updated_at, the book_tags and tags primary keys),
+        not by scanning a heavily reviewed book's reviews.
+    """
+    columns = [BookModel.bid, BookModel.updated_at, BookModel.version]
+    if summary:
+        return columns
+    return columns + [
+        BookModel.review_count,
+        select(func.max(ReviewModel.updated_at)).where(ReviewModel.book_uid == BookModel.bid)
+        .scalar_subquery().label("reviews_updated_at"),
+        select(func.array_agg(aggregate_order_by(BookTagModel.tag_id, BookTagModel.tag_id)))
+        .where(BookTagModel.book_id == BookModel.bid)
+        .scalar_subquery().label("tag_ids"),
+        # BookResponse embeds tag names: a rename must change the ETag as well
+        select(func.array_agg(aggregate_order_by(TagModel.name, BookTagModel.tag_id)))
+        .select_from(BookTagModel)
+        .join(TagModel, TagModel.uid == BookTagModel.tag_id)
+        .where(BookTagModel.book_id == BookModel.bid)
+        .scalar_subquery().label("tag_names"),
+    ]
+
+
+def to_book_validator(row) -> BookValidator:
+    return BookValidator(
+        bid=row.bid,
+        updated_at=row.updated_at,
+        version=row.version,
+        review_count=getattr(row, "review_count", 0) or 0,
+        reviews_updated_at=getattr(row, "reviews_updated_at", None),
+        tag_ids=getattr(row, "tag_ids", None) or [],
+        tag_names=getattr(row, "tag_names", None) or [],
+    )
+
+
+def book_etag(
+        validators: Sequence[BookValidator], view: BookView, version: Optional[int] = None
+) -> Tuple[str, Optional[datetime]]:
+    """ (ETag, Last-Modified) of a single book or of a page of books in the given view.
+        - version: row version to expose in a single book's ETag, for If-Match on writes
+    """
+    etag = make_etag(view.value, *(validator.version_key(view) for validator in validators), version=version)
+    last_modified = max((validator.last_modified for validator in validators), default=None)
+    return etag, last_modified
+
+
+def validate_book_batch(items: Sequence[Any], offset: int) -> Tuple[List[dict], List[int], List[BookBulkError]]:
+    """ Validate one batch of bulk-ingest items.
+        - items: dicts (JSON array) or raw JSON strings (NDJSON lines)
+        - offset: index of items[0] in the whole submission, used in error reports
+        - returns: (valid rows, their indexes, per-item errors)
+    """
+    rows, indexes, errors = [], [], []
+    for position, item in enumerate(items, start=offset):
+        try:
+            if isinstance(item, (str, bytes)):
+                book = BookCreate.model_validate_json(item)
+            else:
+                book = BookCreate.model_validate(item)
+        except ValidationError as exc:
+            errors.append(BookBulkError(
+                index=position,
+                errors=exc.errors(include_url=False, include_context=False, include_input=False),
+            ))
+            continue
+        rows.append(book.model_dump())
+        indexes.append(position)
+    return rows, indexes, errors
 
 
 class BookService:
@@ -13,39 +188,305 @@ class BookService:
         self.db = db
 
     async def create_book(self, book_data: BookCreate, user_uid) -> BookModel:
-        new_book = BookModel(**book_data.model_dump())
-        new_book.user_uid = user_uid
-        self.db.add(new_book)
-        await self.db.refresh(new_book)
-        return new_book
+        """ One INSERT ... RETURNING; server-generated columns come back with the row """
+        stmt = (
+            insert(BookModel)
+            .values(**book_data.model_dump(), user_uid=user_uid)
+            .returning(BookModel)
+            .options(*book_write_options())
+        )
+        book = (await self.db.scalars(stmt)).one()
+        # Nothing can reference a book that did not exist a statement ago
+        set_committed_value(book, "reviews", [])
+        set_committed_value(book, "tags", [])
+        return book
+
+    async def bulk_create_books(self, items: AsyncIterator[Any], user_uid, batch_size: int) -> BookBulkResult:
+        """ Ingest many books with one multi-row INSERT ... RETURNING per batch.
+            Each batch runs in its own savepoint, so invalid items are reported per index without
+            aborting the rest of the submission; if the database rejects a batch, its rows are retried
+            one by one and only those that fail again are reported.
+        """
+        result = BookBulkResult()
+        batch, offset = [], 0
+        async for item in items:
+            batch.append(item)
+            if len(batch) == batch_size:
+                await self._insert_book_batch(batch, offset, user_uid, result)
+                offset += len(batch)
+                batch = []
+        if batch:
+            await self._insert_book_batch(batch, offset, user_uid, result)
+        return result
+
+    async def _insert_book_batch(self, batch: List[Any], offset: int, user_uid, result: BookBulkResult) -> None:
+        rows, indexes, errors = validate_book_batch(batch, offset)
+        result.errors.extend(errors)
+        if not rows:
+            return
+        for row in rows:
+            row["user_uid"] = user_uid
+        try:
+            bids = await self._insert_book_rows(rows)
+        except SQLAlchemyError as exc:
+            # One bad row fails the whole statement: retry row by row so only the failing items are reported
+            logger.warning(f"Bulk book insert failed for items {indexes[0]}..{indexes[-1]}, retrying one by one: {exc}")
+            bids = []
+            for index, row in zip(indexes, rows):
+                try:
+                    bids += await self._insert_book_rows([row])
+                except SQLAlchemyError as row_exc:
+                    db_error = {"type": "database_error", "msg": str(getattr(row_exc, "orig", None) or row_exc)}
+                    result.errors.append(BookBulkError(index=index, errors=[db_error]))
+        result.created += len(bids)
+        result.bids.extend(bids)
+
+    async def _insert_book_rows(self, rows: List[dict]) -> List[uuid.UUID]:
+        """ One multi-row INSERT ... RETURNING in its own savepoint; bids in the order of rows """
+        async with self.db.begin_nested():
+            inserted = await self.db.execute(
+                insert(BookModel).returning(BookModel.bid, sort_by_parameter_order=True), rows
+            )
+            return list(inserted.scalars().all())
 
     async def get_book(self, book_id: uuid.UUID) -> Optional[BookModel]:
+        """ A book with the reviews and tags BookResponse embeds """
         result = await self.db.execute(
-            select(BookModel).where(BookModel.bid == book_id))
+            select(BookModel).where(BookModel.bid == book_id).options(*book_detail_options()))
         return result.scalar_one_or_none()
 
-    async def update_book(self, book_id: uuid.UUID, book_data: BookUpdate) -> Optional[BookModel]:
+    async def get_cached_book(self, book_id: uuid.UUID) -> Optional[CachedBook]:
+        """ Serialized BookResponse with its validators from the Redis book cache, None on a miss """
+        return await book_cache.get(book_id)
+
+    async def get_book_validator(self, book_id: uuid.UUID) -> Optional[BookValidator]:
+        """ One aggregate query, no relationship loading: enough to answer If-None-Match """
+        result = await self.db.execute(select(*book_validator_columns()).where(BookModel.bid == book_id))
+        row = result.one_or_none()
+        return to_book_validator(row) if row else None
+
+    async def load_book(self, book_id: uuid.UUID) -> Optional[CachedBook]:
+        """ Load and serialize a book with its relationships, then populate the book cache.
+            Validators are taken from the loaded graph so they always describe the cached payload.
+        """
+        generation = await book_cache.generation(book_id)  # before the row is read
         book = await self.get_book(book_id)
         if not book:
-            raise BookNotFound(details={"book_id": str(book_id)})
+            return None
+        etag, last_modified = book_etag([BookValidator.from_book(book)], BookView.full, version=book.version)
+        entry = CachedBook(etag, last_modified, BookResponse.model_validate(book).model_dump_json())
+        await book_cache.set(book_id, entry, generation)
+        return entry
 
-        for field, value in book_data.model_dump(exclude_unset=True).items():
-            setattr(book, field, value)
-        await self.db.refresh(book)
-        return book
+    async def get_rating_stats(self, book_id: uuid.UUID) -> Optional[BookRatingStats]:
+        """ Star histogram of a book from its single rollup row; None if the book does not exist """
+        stats = BookRatingStatsModel
+        stmt = (
+            select(BookModel.bid, stats.review_count, stats.avg_rating,
+                   *(getattr(stats, f"count_{stars}") for stars in RATING_VALUES))
+            .outerjoin(stats, stats.book_uid == BookModel.bid)
+            .where(BookModel.bid == book_id)
+        )
+        row = (await self.db.execute(stmt)).one_or_none()
+        if not row:
+            return None
+        return BookRatingStats(
+            book_uid=row.bid,
+            review_count=row.review_count or 0,
+            avg_rating=row.avg_rating,
+            histogram={stars: getattr(row, f"count_{stars}") or 0 for stars in RATING_VALUES},
+        )
 
-    async def delete_book(self, book_id: uuid.UUID) -> bool:
-        book = await self.get_book(book_id)
+    async def get_books_by_ids(self, book_ids: Sequence[uuid.UUID], summary: bool = False) -> List[BookModel]:
+        """ Load books in one query (plus one selectin pass per relationship), keeping the order of book_ids """
+        if not book_ids:
+            return []
+        stmt = (
+            select(BookModel)
+            .where(BookModel.bid.in_(book_ids))
+            .options(*(book_summary_options() if summary else book_detail_options()))
+        )
+        results = await self.db.execute(stmt)
+        books = {book.bid: book for book in results.scalars().all()}
+        return [books[bid] for bid in book_ids if bid in books]
+
+    async def _raise_write_miss(self, book_id: uuid.UUID, expected_versions: Optional[List[int]]):
+        """ A guarded write matched no row: tell a missing book (404) from a stale version (412) """
+        if expected_versions is not None:
+            current = await self.db.scalar(select(BookModel.version).where(BookModel.bid == book_id))
+            if current is not None:
+                raise PreconditionFailed(details={"book_id": str(book_id), "current_version": current})
+        raise BookNotFound(details={"book_id": str(book_id)})
+
+    async def update_book(
+            self, book_id: uuid.UUID, book_data: BookUpdate, expected_versions: Optional[List[int]] = None
+    ) -> Optional[BookModel]:
+        """ One UPDATE ... RETURNING, independent of how many reviews/tags the book has.
+            - expected_versions: versions from If-Match; the row is only written if it still has one
+              of them (compare-and-set in the WHERE clause, no row lock held across requests)
+        """
+        changes = book_data.model_dump(exclude_unset=True)
+        if changes:
+            stmt = (
+                update(BookModel)
+                .where(BookModel.bid == book_id)
+                .values(**changes, version=BookModel.version + 1)
+                .returning(BookModel)
+                .options(*book_write_options())
+                .execution_options(synchronize_session=False)
+            )
+        else:
+            stmt = select(BookModel).where(BookModel.bid == book_id).options(*book_write_options())
+        if expected_versions is not None:
+            stmt = stmt.where(BookModel.version.in_(expected_versions))
+        book = (await self.db.scalars(stmt)).one_or_none()
         if not book:
-            raise BookNotFound(details={"book_id": str(book_id)})
-        await self.db.delete(book)
+            await self._raise_write_miss(book_id, expected_versions)
+        after_commit(self.db, book_cache.invalidate, book_id)
+        return book
+
+    async def delete_book(self, book_id: uuid.UUID, expected_versions: Optional[List[int]] = None) -> bool:
+        """ One DELETE ... RETURNING; book_tags rows cascade and reviews are detached by their FKs """
+        stmt = (
+            delete(BookModel)
+            .where(BookModel.bid == book_id)
+            .returning(BookModel.bid)
+            .execution_options(synchronize_session=False)
+        )
+        if expected_versions is not None:
+            stmt = stmt.where(BookModel.version.in_(expected_versions))
+        result = await self.db.execute(stmt)
+        if result.scalar_one_or_none() is None:
+            await self._raise_write_miss(book_id, expected_versions)
+        after_commit(self.db, book_cache.invalidate, book_id)
+        after_commit(self.db, tag_facet_cache.invalidate)  # its book_tags rows are gone
         return True
 
-    async def list_books(self) -> Sequence[BookModel]:
-        results = await self.db.execute(select(BookModel))
-        books = results.scalars().all()
-        return books
+    async def list_books(
+            self, limit: int, cursor: Optional[str] = None, summary: bool = False,
+            filters: Optional[BookFilter] = None, sort: BookSort = BookSort.newest,
+            tag_ids: Optional[Sequence[uuid.UUID]] = None, tag_match: TagMatch = TagMatch.all,
+    ) -> Tuple[List[BookValidator], Optional[str]]:
+        """ Keyset-paginated, filtered catalogue. Returns the page as validators only;
+            callers load the books with get_books_by_ids once a 304 has been ruled out.
+            - cursor: next_cursor of the previous page, encodes the sort and its last (sort key, bid)
+            - summary: validators for the summary view, which skip review/tag state
+            - filters / sort: see BookFilter and BookSort
+            - tag_ids / tag_match: only books carrying all / any of these tags, see books_with_tags
+            - returns: (validators, next_cursor)
+        """
+        descending = sort.value.startswith("-")
+        column, parse = BOOK_SORT_COLUMNS[sort.value.lstrip("-")]
+        if descending:
+            order_by = (column.desc(), BookModel.bid.desc())
+        else:
+            order_by = (column.asc(), BookModel.bid.asc())
+        stmt = (
+            select(column.label("sort_key"), *book_validator_columns(summary))
+            .order_by(*order_by)
+            .limit(limit + 1)
+        )
+        stmt = apply_book_filters(stmt, filters)
+        if tag_ids:
+            stmt = stmt.where(BookModel.bid.in_(books_with_tags(tag_ids, tag_match)))
+        if cursor:
+            cursor_sort, sort_key, bid = decode_cursor(cursor, str, parse, uuid.UUID)
+            if cursor_sort != sort.value:
+                raise InvalidCursor(details={"cursor": cursor, "reason": "cursor belongs to another sort"})
+            keyset = tuple_(column, BookModel.bid)
+            stmt = stmt.where(keyset < (sort_key, bid) if descending else keyset > (sort_key, bid))
+
+        results = await self.db.execute(stmt)
+        rows, next_cursor = split_page(results.all(), limit, lambda row: (sort.value, row.sort_key, row.bid))
+        return [to_book_validator(row) for row in rows], next_cursor
+
+    async def search_books(
+            self, q: str, limit: int, cursor: Optional[str] = None, summary: bool = False
+    ) -> Tuple[List[BookValidator], Optional[str]]:
+        """ Full-text search over title/author/publisher, best match first.
+            - q: web-search syntax ("quoted phrase", -excluded, or)
+            - cursor: next_cursor of the previous page, encodes its last (rank, bid)
+            - returns: (validators, next_cursor), books are loaded with get_books_by_ids
+        """
+        query = func.websearch_to_tsquery(settings.SEARCH_LANGUAGE, q)
+        rank = func.ts_rank(BookModel.search_vector, query, type_=Float)
+        stmt = (
+            select(rank.label("rank"), *book_validator_columns(summary))
+            .where(BookModel.search_vector.bool_op("@@")(query))
+            .order_by(rank.desc(), BookModel.bid.desc())
+            .limit(limit + 1)
+        )
+        if cursor:
+            last_rank, bid = decode_cursor(cursor, float, uuid.UUID)
+            stmt = stmt.where(tuple_(rank, BookModel.bid) < (last_rank, bid))
+
+        results = await self.db.execute(stmt)
+        rows, next_cursor = split_page(results.all(), limit, lambda row: (row.rank, row.bid))
+        return [to_book_validator(row) for row in rows], next_cursor
+
+    async def top_rated_books(
+            self, limit: int, cursor: Optional[str] = None, min_reviews: int = 1, summary: bool = False
+    ) -> Tuple[List[BookValidator], Optional[str]]:
+        """ Books by average review rating, served from ix_books_top_rated instead of aggregating reviews.
+            - cursor: next_cursor of the previous page, encodes its last (avg_rating, review_count, bid)
+            - min_reviews: hide books with fewer reviews, so one 5-star review does not top the chart
+            - returns: (validators, next_cursor), books are loaded with get_books_by_ids
+        """
+        stmt = (
+            select(BookModel.avg_rating, *book_validator_columns(summary))
+            .where(BookModel.avg_rating.isnot(None), BookModel.review_count >= min_reviews)
+            .order_by(BookModel.avg_rating.desc(), BookModel.review_count.desc(), BookModel.bid.desc())
+            .limit(limit + 1)
+        )
+        if summary:
+            # review_count is only part of the full-view validator columns
+            stmt = stmt.add_columns(BookModel.review_count)
+        if cursor:
+            avg_rating, review_count, bid = decode_cursor(cursor, float, int, uuid.UUID)
+            stmt = stmt.where(
+                tuple_(BookModel.avg_rating, BookModel.review_count, BookModel.bid) < (avg_rating, review_count, bid))
+
+        results = await self.db.execute(stmt)
+        rows, next_cursor = split_page(
+            results.all(), limit, lambda row: (row.avg_rating, row.review_count, row.bid))
+        return [to_book_validator(row) for row in rows], next_cursor
+
+    async def stream_books(self, batch_size: int) -> AsyncIterator[BookModel]:
+        """ Stream the whole catalogue through a server-side cursor, batch_size rows at a time.
+            Memory stays bounded by one batch whatever the table size.
+        """
+        stmt = (
+            select(BookModel)
+            .options(*book_summary_options())
+            .order_by(BookModel.created_at, BookModel.bid)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.db.stream_scalars(stmt)
+        async for book in result:
+            yield book
+
+    async def get_books_by_user(
+            self, user_id: uuid.UUID, limit: int, cursor: Optional[str] = None, summary: bool = False
+    ) -> Tuple[List[BookValidator], Optional[str]]:
+        """ Keyset-paginated books submitted by a user, newest first, read from ix_books_user_uid_created_at_bid.
+            - cursor: next_cursor of the previous page, encodes its last (created_at, bid)
+            - returns: (validators, next_cursor), books are loaded with get_books_by_ids
+        """
+        stmt = (
+            select(BookModel.created_at, *book_validator_columns(summary))
+            .where(BookModel.user_uid == user_id)
+            .order_by(BookModel.created_at.desc(), BookModel.bid.desc())
+            .limit(limit + 1)
+        )
+        if cursor:
+            created_at, bid = decode_cursor(cursor, datetime.fromisoformat, uuid.UUID)
+            stmt = stmt.where(tuple_(BookModel.created_at, BookModel.bid) < (created_at, bid))
+
+        results = await self.db.execute(stmt)
+        rows, next_cursor = split_page(results.all(), limit, lambda row: (row.created_at, row.bid))
+        return [to_book_validator(row) for row in rows], next_cursor
 
-    async def get_books_by_user(self, user_id: uuid.UUID) -> Sequence[BookModel]:
-        results = await self.db.execute(select(BookModel).where(BookModel.user_uid == user_id))
-        return results.scalars().all()
+    async def count_books_by_user(self, user_id: uuid.UUID) -> int:
+        """ Number of books submitted by a user, an index-only count on the user_uid index """
+        result = await self.db.execute(select(func.count()).where(BookModel.user_uid == user_id))
+        return result.scalar_one()
@@ -44,6 +44,41 @@ class Settings(BaseSettings):
 
     DOMAIN_URL: str = ""
 
+    DEFAULT_PAGE_SIZE: int = 20
+    MAX_PAGE_SIZE: int = 100
+    EXPORT_BATCH_SIZE: int = 1000  # rows fetched per server-side cursor round trip
+    BULK_INSERT_BATCH_SIZE: int = 500  # items validated and inserted per savepoint
+    SEARCH_LANGUAGE: str = "english"  # text search configuration, must match the search_vector column
+
+    BOOK_CACHE_TTL: int = 5 * 60  # 5 minutes
+    BOOK_CACHE_TTL_JITTER: float = 0.1  # +/- 10% so entries written together do not expire together
+
+    # Write-behind review ingestion through a Redis stream (off: one transaction per review)
+    REVIEW_BUFFER_ENABLED: bool = False
+    REVIEW_BUFFER_STREAM: str = "reviews:ingest"
+    REVIEW_BUFFER_GROUP: str = "review-writers"
+    REVIEW_BUFFER_BATCH_SIZE: int = 500  # flush after this many reviews ...
+    REVIEW_BUFFER_FLUSH_INTERVAL_MS: int = 200  # ... or after this long, whichever comes first
+    REVIEW_BUFFER_MAX_LENGTH: int = 100_000  # backlog at which new reviews are refused with 503
+    REVIEW_BUFFER_CLAIM_IDLE_MS: int = 30_000  # redeliver entries a crashed writer read but never acknowledged
+    REVIEW_BUFFER_MAX_DELIVERIES: int = 3  # entries delivered this often are retried alone, then dead-lettered
+    REVIEW_BUFFER_DEAD_LETTER_STREAM: str = "reviews:ingest:dead"
+
+    # Process-local tag name -> uid dictionary, invalidated across workers over Redis pub/sub
+    TAG_CACHE_CHANNEL: str = "tags:invalidate"
+    TAG_CACHE_TTL: int = 60  # reload at least this often, bounding staleness from a missed invalidation
+    TAG_USAGE_REFRESH_INTERVAL: int = 5 * 60  # seconds between background books-per-tag recounts
+    TAG_FACETS_TTL: int = 30  # books-per-tag counts; tag assignment invalidates them sooner
+
+    # Authenticated-principal snapshots: bounded in-process LRU in front of Redis
+    PRINCIPAL_CACHE_SIZE: int = 10_000  # entries per worker process
+    PRINCIPAL_CACHE_LOCAL_TTL: int = 30  # seconds an in-process entry is trusted
+    PRINCIPAL_CACHE_TTL: int = 5 * 60  # seconds a Redis entry lives
+    PRINCIPAL_CACHE_CHANNEL: str = "principals:invalidate"
+
+    # Test mode: fail on any load a query did not plan (lazy relationship loads, implicit column refreshes)
+    STRICT_LOADING: bool = False
+
 
     model_config = SettingsConfigDict(
         env_file= os.path.join(os.getcwd(), ".env"), # absolute path to .env
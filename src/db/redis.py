@@ -1,5 +1,6 @@
 import redis.asyncio as redis
 import time
+from typing import AsyncIterator
 
 from src.core.config import settings
 
@@ -65,6 +66,192 @@ class RedisClient:
             await self.redis_client.delete(key)
 
 
+    # Read a cached value | read-through caches
+    async def get_value(self, key: str) -> str | None:
+        """Get a cached string value, None if missing or expired."""
+        if not self.redis_client:
+            await self.init_redis()
+        return await self.redis_client.get(key)
+
+
+    # Store a cached value with TTL | read-through caches
+    async def set_value(self, key: str, value: str, ttl: int):
+        """Cache a string value for ttl seconds."""
+        if not self.redis_client:
+            await self.init_redis()
+        await self.redis_client.setex(key, ttl, value)
+
+
+    # Store a cached value unless its guard changed | read-through caches racing invalidation
+    async def set_value_if(self, key: str, value: str, ttl: int, guard_key: str, guard_value: str) -> bool:
+        """Cache a string value for ttl seconds only if guard_key still holds guard_value ("" when
+        missing), atomically. Returns whether the value was stored."""
+        if not self.redis_client:
+            await self.init_redis()
+        stored = await self.redis_client.eval(
+            "if (redis.call('GET', KEYS[2]) or '') ~= ARGV[3] then return 0 end "
+            "redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2]) return 1",
+            2, key, guard_key, value, ttl, guard_value,
+        )
+        return stored == 1
+
+
+    # Bump guard counters and drop values | write invalidation racing read-through loads
+    async def bump_and_delete(self, counter_keys: list[str], ttl: int, *keys: str):
+        """Increment each counter (expiring ttl seconds later) and delete the keys, atomically."""
+        if not self.redis_client:
+            await self.init_redis()
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            for counter_key in counter_keys:
+                pipe.incr(counter_key)
+                pipe.expire(counter_key, ttl)
+            if keys:
+                pipe.delete(*keys)
+            await pipe.execute()
+
+
+    # Drop cached values | write invalidation
+    async def delete_keys(self, *keys: str):
+        """Delete the given keys in one round trip."""
+        if not keys:
+            return
+        if not self.redis_client:
+            await self.init_redis()
+        await self.redis_client.delete(*keys)
+
+
+    # Read one field of a cached hash | grouped read-through caches
+    async def hash_get(self, key: str, field: str) -> str | None:
+        """Get a hash field, None if the field or the hash is missing."""
+        if not self.redis_client:
+            await self.init_redis()
+        return await self.redis_client.hget(key, field)
+
+
+    # Store one field of a cached hash | grouped read-through caches
+    async def hash_set(self, key: str, field: str, value: str, ttl: int):
+        """Set a hash field; the hash expires ttl seconds after its first field was written,
+        so the whole group can be dropped with delete_keys."""
+        if not self.redis_client:
+            await self.init_redis()
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, field, value)
+            pipe.expire(key, ttl, nx=True)
+            await pipe.execute()
+
+
+    # Append an entry to a stream | write-behind buffers
+    async def stream_add(self, stream: str, fields: dict) -> str:
+        """Append fields to a stream, returns the entry id."""
+        if not self.redis_client:
+            await self.init_redis()
+        return await self.redis_client.xadd(stream, fields)
+
+
+    # Count stream entries | backpressure
+    async def stream_length(self, stream: str) -> int:
+        """Number of entries currently in the stream."""
+        if not self.redis_client:
+            await self.init_redis()
+        return await self.redis_client.xlen(stream)
+
+
+    # Create a consumer group | write-behind buffers
+    async def stream_create_group(self, stream: str, group: str):
+        """Create the consumer group (and the stream) unless it already exists."""
+        if not self.redis_client:
+            await self.init_redis()
+        try:
+            await self.redis_client.xgroup_create(stream, group, id="0", mkstream=True)
+        except redis.ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+
+    # Read new entries for a consumer | write-behind buffers
+    async def stream_read_group(self, stream: str, group: str, consumer: str, count: int, block_ms: int) -> list:
+        """Up to count undelivered entries as (entry_id, fields), waiting at most block_ms."""
+        if not self.redis_client:
+            await self.init_redis()
+        response = await self.redis_client.xreadgroup(group, consumer, {stream: ">"}, count=count, block=block_ms)
+        return [entry for _, entries in response or [] for entry in entries]
+
+
+    # Take over stale pending entries | at-least-once delivery
+    async def stream_claim_idle(self, stream: str, group: str, consumer: str, min_idle_ms: int, count: int) -> list:
+        """Claim entries delivered to any consumer but unacknowledged for min_idle_ms."""
+        if not self.redis_client:
+            await self.init_redis()
+        _, entries, *_ = await self.redis_client.xautoclaim(stream, group, consumer, min_idle_ms, count=count)
+        return [entry for entry in entries if entry[1]]  # deleted entries come back without fields
+
+
+    # How often pending entries were delivered | poison entry detection
+    async def stream_delivery_counts(self, stream: str, group: str, *entry_ids: str) -> dict[str, int]:
+        """Times each pending entry has been delivered (XPENDING), keyed by entry id."""
+        if not entry_ids:
+            return {}
+        if not self.redis_client:
+            await self.init_redis()
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for entry_id in entry_ids:
+                pipe.xpending_range(stream, group, min=entry_id, max=entry_id, count=1)
+            pending = await pipe.execute()
+        return {item["message_id"]: item["times_delivered"] for items in pending for item in items}
+
+
+    # Move an entry to a dead-letter stream | poison entries
+    async def stream_dead_letter(self, stream: str, group: str, dead_stream: str, entry_id: str, fields: dict,
+                                 max_length: int):
+        """Copy an entry to dead_stream (capped near max_length), then acknowledge and delete it, atomically."""
+        if not self.redis_client:
+            await self.init_redis()
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.xadd(dead_stream, fields, maxlen=max_length, approximate=True)
+            pipe.xack(stream, group, entry_id)
+            pipe.xdel(stream, entry_id)
+            await pipe.execute()
+
+
+    # Acknowledge and drop processed entries | write-behind buffers
+    async def stream_ack(self, stream: str, group: str, *entry_ids: str):
+        """Acknowledge entries and delete them from the stream in one round trip."""
+        if not entry_ids:
+            return
+        if not self.redis_client:
+            await self.init_redis()
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.xack(stream, group, *entry_ids)
+            pipe.xdel(stream, *entry_ids)
+            await pipe.execute()
+
+
+    # Broadcast a message to every subscriber | cross-worker cache invalidation
+    async def publish(self, channel: str, message: str) -> int:
+        """Publish a message on a channel, returns the number of subscribers that received it."""
+        if not self.redis_client:
+            await self.init_redis()
+        return await self.redis_client.publish(channel, message)
+
+
+    # Receive channel messages | cross-worker cache invalidation
+    async def subscribe(self, channel: str) -> AsyncIterator[str]:
+        """Yield messages published on a channel until the caller stops iterating; the
+        first item is "" once the subscription is active, so callers can resync state."""
+        if not self.redis_client:
+            await self.init_redis()
+        pubsub = self.redis_client.pubsub()
+        try:
+            await pubsub.subscribe(channel)
+            async for message in pubsub.listen():
+                if message["type"] == "subscribe":
+                    yield ""
+                elif message["type"] == "message":
+                    yield message["data"]
+        finally:
+            await pubsub.aclose()
+
+
     # List revoked tokens for debugging | admin/debug
     async def show_all_revoked_tokens(self):
         """List all revoked tokens currently stored in Redis."""
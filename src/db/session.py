@@ -1,5 +1,8 @@
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Awaitable, Callable, Iterable, Optional
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session, SessionTransaction
 
 from src.core.config import settings, EnvironmentSchema
 from src.db.base import Base
@@ -22,6 +25,74 @@ AsyncSessionLocal = async_sessionmaker(
     autocommit=False
 )
 
+class UnplannedLoad(InvalidRequestError):
+    """ STRICT_LOADING: a query loaded something its loader options did not ask for """
+
+
+_EXPLICIT_REFRESH = "strict_loading.explicit_refresh"
+
+
+@event.listens_for(Session, "do_orm_execute")
+def refuse_unplanned_loads(orm_execute_state: ORMExecuteState) -> None:
+    """ With STRICT_LOADING, fail the request instead of emitting SQL for a lazy relationship load or for
+        reloading expired/deferred columns on attribute access. Reloads through explicit_refresh() are allowed.
+        Relationships are lazy="raise" already; this also covers lazyload() overrides and column loads.
+    """
+    if not settings.STRICT_LOADING or not orm_execute_state.is_select:
+        return  # INSERT/UPDATE/DELETE carry no load options; their RETURNING rows load what they name
+    # is_relationship_load is also true for the planned selectinload() queries; only lazy loads say where from
+    if orm_execute_state.lazy_loaded_from is not None:
+        raise UnplannedLoad(f"Unplanned lazy load of {orm_execute_state.loader_strategy_path}")
+    if orm_execute_state.is_column_load and not orm_execute_state.session.info.get(_EXPLICIT_REFRESH):
+        raise UnplannedLoad(f"Unplanned load of expired or deferred columns: {orm_execute_state.statement}")
+
+
+async def explicit_refresh(
+        session: AsyncSession, instance: Any, attribute_names: Optional[Iterable[str]] = None,
+) -> None:
+    """ session.refresh() that STRICT_LOADING lets through: a reload the code asks for, not one an
+        attribute access triggers. The ORM does not expose that difference publicly, so it is marked here.
+    """
+    session.info[_EXPLICIT_REFRESH] = True
+    try:
+        await session.refresh(instance, attribute_names)
+    finally:
+        session.info.pop(_EXPLICIT_REFRESH, None)
+
+
+_PENDING_CALLBACKS = "after_commit.pending"
+_COMMITTED_CALLBACKS = "after_commit.committed"
+
+
+def after_commit(session: AsyncSession, callback: Callable[..., Awaitable[Any]], *args: Any) -> None:
+    """ Await callback(*args) once the session's transaction has committed; dropped if it rolls back.
+        Cache invalidations go through here: run before the commit, a concurrent read could still load
+        the old row and put it back in the cache.
+    """
+    session.info.setdefault(_PENDING_CALLBACKS, []).append((callback, args))
+
+
+@event.listens_for(Session, "after_commit")
+def _release_after_commit_callbacks(session: Session) -> None:
+    if session.in_nested_transaction():
+        return  # a savepoint was released, the outer transaction can still roll back
+    pending = session.info.pop(_PENDING_CALLBACKS, None)
+    if pending:
+        session.info.setdefault(_COMMITTED_CALLBACKS, []).extend(pending)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_after_commit_callbacks(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:  # the outer transaction ended without committing what is still pending
+        session.info.pop(_PENDING_CALLBACKS, None)
+
+
+async def run_after_commit(session: AsyncSession) -> None:
+    """ Await the callbacks of every transaction the session has committed so far """
+    for callback, args in session.info.pop(_COMMITTED_CALLBACKS, []):
+        await callback(*args)
+
+
 # Dependency for FastAPI
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     # async with AsyncSessionLocal() as session:
@@ -34,6 +105,7 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
             await session.rollback()  # auto rollback on error
             raise
         finally:
+            await run_after_commit(session)  # invalidate caches for whatever did commit
             await session.close()  # always close session
 
 # DB initializer |  Only for development - use Alembic in production
@@ -1,16 +1,22 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 
 from src.auth.routes import auth_router
 from src.books.routes import book_router
+from src.books.service import BookService
 from src.core.config import settings, EnvironmentSchema
 from src.core.logger import logger
 from src.core.middleware import register_middleware
 from src.db.redis import redis_client
-from src.db.session import init_db
+from src.db.session import init_db, AsyncSessionLocal
+from src.reviews.buffer import review_buffer
 from src.reviews.routes import reviews_router
 from src.shared.exception_handlers import register_exception_handlers
+from src.tags.cache import tag_cache
 from src.tags.routes import tags_router
+from src.tags.services import TagService, refresh_tag_usage_periodically
+from src.user.cache import principal_cache
 
 version = "v1"
 description = """
@@ -41,9 +47,34 @@ async def lifespan(apps: FastAPI):
     else:
         print("🚀 Running in {EnvironmentSchema.DEV} mode - use Alembic migrations")
 
+    # Tag dictionary cache: warm the names, then follow invalidations published by other workers.
+    # Usage counts for suggestions are refreshed in the background, off the request path.
+    try:
+        async with AsyncSessionLocal() as session:
+            await TagService(session, BookService(session)).warm_tag_cache()
+        print("✅ Tag cache warmed")
+    except Exception as exc:
+        logger.warning(f"Tag cache warm-up failed, it will load on first use: {exc}")
+    tag_listener = asyncio.create_task(tag_cache.listen())
+    tag_usage_refresher = asyncio.create_task(refresh_tag_usage_periodically(AsyncSessionLocal))
+    principal_listener = asyncio.create_task(principal_cache.listen())
+
+    # Write-behind review ingestion
+    review_writer = None
+    if settings.REVIEW_BUFFER_ENABLED:
+        review_writer = asyncio.create_task(review_buffer.run(AsyncSessionLocal))
+        print("✅ Review buffer writer started")
+
     yield # App runs here
 
     # Shutdown
+    if review_writer:
+        review_buffer.stop()  # the writer finishes and acknowledges its current batch
+        await review_writer
+    for task in (tag_listener, tag_usage_refresher, principal_listener):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
     await redis_client.close_redis()
     print(f" 🛑 Server has been stopped 🛑 and Redis closed. ")
 
@@ -0,0 +1,235 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import Integer, exists, select, tuple_, update, values, column
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
+from sqlalchemy.exc import InterfaceError, OperationalError, StatementError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.books.cache import book_cache
+from src.books.models import BookModel
+from src.books.service import rating_stats_upsert
+from src.core.config import settings
+from src.core.logger import logger
+from src.db.redis import redis_client, RedisClient
+from src.db.session import after_commit, run_after_commit
+from src.reviews.models import ReviewModel
+from src.reviews.schemas import ReviewAccepted, ReviewCreate
+from src.shared.exception_handlers import BookNotFound, ReviewBufferFull
+from src.shared.utils import now_utc_dt
+from src.user.models import UserModel
+
+StreamEntry = Tuple[str, Dict[str, str]]
+
+
+def review_row(fields: Dict[str, str]) -> dict:
+    """ Stream entry fields -> reviews row """
+    return {
+        "uid": uuid.UUID(fields["uid"]),
+        "book_uid": uuid.UUID(fields["book_uid"]),
+        "user_uid": uuid.UUID(fields["user_uid"]),
+        "review_text": fields["review_text"],
+        "rating": int(fields["rating"]),
+        "created_at": datetime.fromisoformat(fields["created_at"]),
+        "updated_at": datetime.fromisoformat(fields["created_at"]),
+    }
+
+
+class ReviewBuffer:
+    """ Write-behind ingestion of reviews through a Redis stream consumer group.
+        - submit: validate, check the book exists and append to the stream (202); 503 once the backlog
+          reaches REVIEW_BUFFER_MAX_LENGTH, so a stalled writer pushes back on clients instead of Redis memory
+        - run: background writer, flushes every REVIEW_BUFFER_FLUSH_INTERVAL_MS or REVIEW_BUFFER_BATCH_SIZE
+          reviews with one multi-row INSERT, one aggregate UPDATE and one rating-histogram upsert per batch
+        - delivery is at-least-once: entries are acknowledged only after the batch commits, and entries
+          left pending by a crashed writer are reclaimed; reviews are upserted per (book, user) and rating
+          deltas computed from the stored rows, so redelivery never duplicates a review or double counts it
+        - an entry Postgres always rejects fails every batch it is in; once reclaimed entries have been
+          delivered REVIEW_BUFFER_MAX_DELIVERIES times they are written one by one, and one the database
+          still rejects on its own is moved to REVIEW_BUFFER_DEAD_LETTER_STREAM so the backlog keeps draining
+    """
+
+    def __init__(self, client: RedisClient):
+        self.client = client
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._stopping = asyncio.Event()
+
+    async def submit(
+            self, session: AsyncSession, review_data: ReviewCreate, book_uid: uuid.UUID, user_uid,
+    ) -> ReviewAccepted:
+        stream = settings.REVIEW_BUFFER_STREAM
+        backlog = await self.client.stream_length(stream)
+        if backlog >= settings.REVIEW_BUFFER_MAX_LENGTH:
+            raise ReviewBufferFull(details={"backlog": backlog})
+        # Primary key probe, like add_review_to_book: a review of a missing book would be dropped at flush
+        if not await session.scalar(select(exists().where(BookModel.bid == book_uid))):
+            raise BookNotFound(details={"book_id": str(book_uid)})
+        accepted = ReviewAccepted(book_uid=book_uid, user_uid=user_uid)
+        await self.client.stream_add(stream, {
+            "uid": str(uuid.uuid4()),  # used only if the user has no review of the book yet
+            "book_uid": str(book_uid),
+            "user_uid": str(user_uid),
+            "review_text": review_data.review_text,
+            "rating": str(review_data.rating),
+            "created_at": now_utc_dt().isoformat(),
+        })
+        return accepted
+
+    async def run(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        """ Flush loop, started from the app lifespan; returns after stop() once the current batch is written """
+        stream, group = settings.REVIEW_BUFFER_STREAM, settings.REVIEW_BUFFER_GROUP
+        group_ready = False
+        while not self._stopping.is_set():
+            try:
+                if not group_ready:  # retried like a failed flush, so Redis being down at startup is survivable
+                    await self.client.stream_create_group(stream, group)
+                    group_ready = True
+                    logger.info(f"Review buffer writer {self.consumer} consuming {stream}")
+                entries, suspects = await self._next_batch(stream, group)
+                for entry in suspects:
+                    await self._write_or_dead_letter(session_factory, entry)
+                if entries:
+                    await self._write(session_factory, entries)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                # Unacknowledged entries stay pending and are reclaimed after REVIEW_BUFFER_CLAIM_IDLE_MS
+                logger.error(f"Review buffer writer failed: {exc}")
+                await asyncio.sleep(settings.REVIEW_BUFFER_FLUSH_INTERVAL_MS / 1000)
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def _write(self, session_factory: async_sessionmaker[AsyncSession], entries: List[StreamEntry]) -> None:
+        """ Flush entries in one transaction, then acknowledge them """
+        async with session_factory() as session:
+            async with session.begin():
+                await self.flush(session, entries)
+            await run_after_commit(session)
+        await self.client.stream_ack(
+            settings.REVIEW_BUFFER_STREAM, settings.REVIEW_BUFFER_GROUP, *(entry_id for entry_id, _ in entries))
+
+    async def _write_or_dead_letter(self, session_factory: async_sessionmaker[AsyncSession], entry: StreamEntry) -> None:
+        """ Write an entry that was redelivered too often on its own; if Postgres rejects it, dead-letter it """
+        try:
+            await self._write(session_factory, [entry])
+        except StatementError as exc:
+            if isinstance(exc, (OperationalError, InterfaceError)):
+                raise  # the database is unavailable, the entry may be fine: keep it pending
+            entry_id, fields = entry
+            dead_stream = settings.REVIEW_BUFFER_DEAD_LETTER_STREAM
+            logger.error(f"Moving review buffer entry {entry_id} to {dead_stream}: {exc}")
+            await self.client.stream_dead_letter(
+                settings.REVIEW_BUFFER_STREAM, settings.REVIEW_BUFFER_GROUP, dead_stream, entry_id,
+                {**fields, "entry_id": entry_id, "error": str(exc)[:500]}, settings.REVIEW_BUFFER_MAX_LENGTH)
+
+    async def _next_batch(self, stream: str, group: str) -> Tuple[List[StreamEntry], List[StreamEntry]]:
+        """ Stale pending entries first, then new ones until the batch is full or the interval elapses.
+            Returns (batch, suspects): suspects are reclaimed entries delivered REVIEW_BUFFER_MAX_DELIVERIES
+            times or more, kept out of the batch so they cannot fail it again.
+        """
+        claimed = await self.client.stream_claim_idle(
+            stream, group, self.consumer, settings.REVIEW_BUFFER_CLAIM_IDLE_MS, count=settings.REVIEW_BUFFER_BATCH_SIZE)
+        batch, suspects = [], []
+        if claimed:
+            deliveries = await self.client.stream_delivery_counts(stream, group, *(entry_id for entry_id, _ in claimed))
+            for entry in claimed:
+                too_often = deliveries.get(entry[0], 0) >= settings.REVIEW_BUFFER_MAX_DELIVERIES
+                (suspects if too_often else batch).append(entry)
+        batch_size = settings.REVIEW_BUFFER_BATCH_SIZE - len(suspects)
+        deadline = time.monotonic() + settings.REVIEW_BUFFER_FLUSH_INTERVAL_MS / 1000
+        while len(batch) < batch_size and not self._stopping.is_set():
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                break
+            batch += await self.client.stream_read_group(
+                stream, group, self.consumer, count=batch_size - len(batch), block_ms=remaining_ms)
+        return batch, suspects
+
+    async def flush(self, session: AsyncSession, entries: List[StreamEntry]) -> int:
+        """ Write one batch inside the caller's transaction, returns the number of reviews written.
+            Like add_review_to_book, a user's later review of a book replaces the earlier one. Rating deltas
+            are computed against the stored reviews while the books are locked, so replaying a batch is a no-op.
+            Reviews of books or users deleted since submission are dropped, as the FK would reject them.
+        """
+        latest: Dict[Tuple[uuid.UUID, uuid.UUID], dict] = {}
+        for entry_id, fields in entries:
+            try:
+                row = review_row(fields)
+            except (KeyError, ValueError) as exc:
+                logger.error(f"Dropping malformed review buffer entry {entry_id}: {exc}")
+                continue
+            key = (row["book_uid"], row["user_uid"])
+            if key not in latest or latest[key]["created_at"] <= row["created_at"]:
+                latest[key] = row
+        if not latest:
+            return 0
+
+        book_ids = set((await session.scalars(
+            select(BookModel.bid)
+            .where(BookModel.bid.in_({book_uid for book_uid, _ in latest}))
+            .order_by(BookModel.bid)  # consistent lock order between concurrent writers
+            .with_for_update()
+        )).all())
+        user_ids = set((await session.scalars(
+            select(UserModel.uid).where(UserModel.uid.in_({user_uid for _, user_uid in latest})))).all())
+        rows = [row for (book_uid, user_uid), row in latest.items() if book_uid in book_ids and user_uid in user_ids]
+        if len(rows) < len(latest):
+            logger.warning(f"Dropping {len(latest) - len(rows)} buffered reviews of deleted books or users")
+        if not rows:
+            return 0
+
+        stored = await session.execute(
+            select(ReviewModel.book_uid, ReviewModel.user_uid, ReviewModel.rating)
+            .where(tuple_(ReviewModel.book_uid, ReviewModel.user_uid).in_(
+                [(row["book_uid"], row["user_uid"]) for row in rows]))
+        )
+        previous = {(book_uid, user_uid): rating for book_uid, user_uid, rating in stored.all()}
+        histograms: Dict[uuid.UUID, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        for row in rows:
+            old_rating = previous.get((row["book_uid"], row["user_uid"]))
+            if old_rating == row["rating"]:
+                continue
+            if old_rating is not None:
+                histograms[row["book_uid"]][old_rating] -= 1
+            histograms[row["book_uid"]][row["rating"]] += 1
+
+        upsert = pg_insert(ReviewModel).values(rows)
+        await session.execute(upsert.on_conflict_do_update(
+            index_elements=[ReviewModel.book_uid, ReviewModel.user_uid],
+            set_={"review_text": upsert.excluded.review_text, "rating": upsert.excluded.rating,
+                  "updated_at": upsert.excluded.updated_at},
+        ))
+        if histograms:
+            await self._apply_aggregates(session, histograms)
+            await session.execute(rating_stats_upsert(histograms))
+        after_commit(session, book_cache.invalidate, *{row["book_uid"] for row in rows})
+        return len(rows)
+
+    @staticmethod
+    async def _apply_aggregates(session: AsyncSession, histograms: Dict[uuid.UUID, Dict[int, int]]) -> None:
+        """ One UPDATE ... FROM (VALUES ...) for every book touched by the batch """
+        batch_totals = values(
+            column("book_uid", UUID(as_uuid=True)), column("added", Integer), column("rating_added", Integer),
+            name="batch_totals",
+        ).data([
+            (book_uid, sum(deltas.values()), sum(stars * count for stars, count in deltas.items()))
+            for book_uid, deltas in histograms.items()
+        ])
+        await session.execute(
+            update(BookModel)
+            .where(BookModel.bid == batch_totals.c.book_uid)
+            .values(review_count=BookModel.review_count + batch_totals.c.added,
+                    rating_sum=BookModel.rating_sum + batch_totals.c.rating_added)
+            .execution_options(synchronize_session=False)
+        )
+
+
+# Create global instance
+review_buffer = ReviewBuffer(redis_client)
@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import Optional, TYPE_CHECKING
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID, TIMESTAMP
-from sqlalchemy import String, Integer, ForeignKey, func
+from sqlalchemy import String, Integer, ForeignKey, Index, func
 
 from src.db.base import Base
 from src.shared.utils import now_utc_dt
@@ -16,6 +16,15 @@ if TYPE_CHECKING:
 # ---------- Review Model ----------
 class ReviewModel(Base):
     __tablename__ = 'reviews'
+    __table_args__ = (
+        # Keyset pagination of a book's / a user's reviews: ORDER BY created_at DESC, uid DESC
+        Index("ix_reviews_book_uid_created_at_uid", "book_uid", "created_at", "uid"),
+        Index("ix_reviews_user_uid_created_at_uid", "user_uid", "created_at", "uid"),
+        # One review per user and book; the conflict target of the review upsert
+        Index("uq_reviews_book_uid_user_uid", "book_uid", "user_uid", unique=True),
+        # Latest review change of a book (the full-view validator's max(updated_at)): one index probe
+        Index("ix_reviews_book_uid_updated_at", "book_uid", "updated_at"),
+    )
 
     uid: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True, nullable=False
@@ -29,16 +38,16 @@ class ReviewModel(Base):
     review_text: Mapped[Optional[str]] = mapped_column(String, nullable=False)
     rating: Mapped[Optional[int]] = mapped_column(Integer, nullable=False)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True),
-        nullable=False, default=now_utc_dt()
+        nullable=False, default=now_utc_dt
     )
     updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True),nullable=False,
-        default=now_utc_dt(), onupdate=now_utc_dt()
+        default=now_utc_dt, onupdate=now_utc_dt
     )
     # Relationships
     user: Mapped[Optional["UserModel"]] = relationship(
-        back_populates="reviews",lazy="selectin")
+        back_populates="reviews",lazy="raise")
     book: Mapped[Optional["BookModel"]] = relationship(
-        back_populates="reviews",lazy="selectin")
+        back_populates="reviews",lazy="raise")
 
     def __repr__(self):
         return f"<Review for book {self.book_uid} by user {self.user_uid}>"
\ No newline at end of file
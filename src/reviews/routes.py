@@ -1,24 +1,79 @@
 import uuid
-from fastapi import APIRouter, status, Depends
-from pydantic import EmailStr
+from typing import Optional, Union
+from fastapi import APIRouter, status, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.dependencies import get_current_user
-from src.auth.schemas import UserBasicDetails
+from src.core.config import settings
+from src.db.session import get_db_session
+from src.reviews.buffer import review_buffer
 from src.reviews.dependencies import ReviewServiceDep
-from src.reviews.schemas import ReviewResponse, ReviewCreate
+from src.reviews.schemas import ReviewResponse, ReviewCreate, ReviewAccepted, ReviewUpdate
+from src.shared.utils import CursorPage
+from src.user.schemas import Principal
 
 
 reviews_router = APIRouter()
 
 
 
-@reviews_router.post("/book/{book_uid}", response_model=ReviewResponse, status_code=status.HTTP_201_CREATED)
+@reviews_router.post("/book/{book_uid}", response_model=Union[ReviewResponse, ReviewAccepted],
+                     status_code=status.HTTP_201_CREATED)
 async def add_review(
     book_uid: uuid.UUID,
     review_data: ReviewCreate,
     review_service: ReviewServiceDep,
-    current_user: UserBasicDetails = Depends(get_current_user)
+    response: Response,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_session),
 ):
-    user_email: EmailStr = current_user.email
-    print("********fro route", user_email)
-    return await review_service.add_review_to_book(review_data, book_uid, user_email)
\ No newline at end of file
+    """ 201 with the review, or 202 keyed by (book, user) when REVIEW_BUFFER_ENABLED queues it for a batched write """
+    if settings.REVIEW_BUFFER_ENABLED:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return await review_buffer.submit(db, review_data, book_uid, current_user.uid)
+    return await review_service.add_review_to_book(review_data, book_uid, current_user.uid)
+
+
+@reviews_router.get("/book/{book_uid}", response_model=CursorPage[ReviewResponse],
+                    dependencies=[Depends(get_current_user)], status_code=status.HTTP_200_OK)
+async def get_book_reviews(
+    book_uid: uuid.UUID,
+    review_service: ReviewServiceDep,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    reviews, next_cursor = await review_service.list_book_reviews(book_uid, limit=limit, cursor=cursor)
+    return CursorPage[ReviewResponse](items=reviews, next_cursor=next_cursor)
+
+
+@reviews_router.get("/user/{user_uid}", response_model=CursorPage[ReviewResponse],
+                    dependencies=[Depends(get_current_user)], status_code=status.HTTP_200_OK)
+async def get_user_reviews(
+    user_uid: uuid.UUID,
+    review_service: ReviewServiceDep,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    reviews, next_cursor = await review_service.list_user_reviews(user_uid, limit=limit, cursor=cursor)
+    return CursorPage[ReviewResponse](items=reviews, next_cursor=next_cursor)
+
+
+@reviews_router.patch("/{review_uid}", response_model=ReviewResponse, status_code=status.HTTP_200_OK)
+async def update_review(
+    review_uid: uuid.UUID,
+    review_data: ReviewUpdate,
+    review_service: ReviewServiceDep,
+    current_user: Principal = Depends(get_current_user),
+):
+    return await review_service.update_review(review_uid, review_data, current_user.uid)
+
+
+@reviews_router.delete("/{review_uid}", status_code=status.HTTP_200_OK)
+async def delete_review(
+    review_uid: uuid.UUID,
+    review_service: ReviewServiceDep,
+    current_user: Principal = Depends(get_current_user),
+) -> dict:
+    await review_service.delete_review(review_uid, current_user.uid)
+    return {"success": True, "message": "Review deleted successfully"}
+
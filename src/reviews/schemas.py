@@ -12,7 +12,8 @@ class ReviewBase(BaseModel):
 
 
 class ReviewCreate(ReviewBase):
-    pass
+    # Whole stars, as stored: the direct and the buffered write path both keep exactly this value
+    rating: int = Field(..., ge=1, le=5, description="Rating between 1 and 5")
 
 
 # ---------- Update ----------
@@ -31,4 +32,14 @@ class ReviewResponse(ReviewBase):
 
     model_config = ConfigDict(
         from_attributes=True # Allows reading directly from ORM objects
-    )
\ No newline at end of file
+    )
+
+
+# ---------- Buffered ingestion ----------
+class ReviewAccepted(BaseModel):
+    # The pending write is identified by (book, user): a resubmission updates the user's existing review,
+    # so the review's uid is only known once the batch is written
+    book_uid: uuid.UUID
+    user_uid: uuid.UUID
+    status: str = "queued"
+
@@ -1,13 +1,22 @@
 import uuid
-from fastapi import HTTPException,status
-from pydantic import EmailStr
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, raiseload
 
-from src.books.service import BookService
+from src.books.cache import book_cache
+from src.books.models import BookModel
+from src.books.service import BookService, rating_stats_upsert
+from src.db.session import after_commit
 from src.reviews.models import ReviewModel
-from src.reviews.schemas import ReviewCreate
+from src.reviews.schemas import ReviewCreate, ReviewUpdate
 from src.user.service import UserService
 from src.core.logger import logger
+from src.shared.exception_handlers import BookNotFound, InsufficientPermission, ReviewNotFound, UserNotFound
+from src.shared.utils import decode_cursor, split_page
 
 
 class ReviewService:
@@ -16,40 +25,144 @@ class ReviewService:
         self.user_service = user_service
         self.book_service = book_service
 
-    async def add_review_to_book(self, review_data: ReviewCreate, book_uid: uuid.UUID, user_email: EmailStr) -> ReviewModel:
+    async def _apply_rating_change(self, book_uid: uuid.UUID, deltas: Dict[int, int]) -> bool:
+        """ Move the book's aggregates and its book_rating_stats row by the given per-star deltas.
+            - deltas: {stars: +1} for a new review, {old: -1, new: +1} for a re-rating, {stars: -1} for a delete
+            - returns: False if the book does not exist; otherwise the book row stays locked until commit
+            The book's version is left alone: reviews are not edits to the book, so they must not fail an
+            editor's If-Match. ETags still change, through review_count and updated_at.
+        """
+        book = await self.db.execute(
+            update(BookModel)
+            .where(BookModel.bid == book_uid)
+            .values(review_count=BookModel.review_count + sum(deltas.values()),
+                    rating_sum=BookModel.rating_sum + sum(stars * delta for stars, delta in deltas.items()))
+            .returning(BookModel.bid)
+            .execution_options(synchronize_session=False)
+        )
+        if book.scalar_one_or_none() is None:
+            return False
+        await self.db.execute(rating_stats_upsert({book_uid: deltas}))
+        return True
+
+    async def add_review_to_book(self, review_data: ReviewCreate, book_uid: uuid.UUID, user_uid: uuid.UUID) -> ReviewModel:
+        """ Create or replace the user's review of a book, idempotent under client retries.
+            1. SELECT the book FOR UPDATE: the existence check, and it serializes review writes per book
+            2. INSERT ... ON CONFLICT (book_uid, user_uid) DO UPDATE ... RETURNING, which also reads the
+               previous rating from the statement's snapshot
+            3. move the rating aggregates only by what actually changed
+        """
+        book = await self.db.execute(select(BookModel.bid).where(BookModel.bid == book_uid).with_for_update())
+        if book.scalar_one_or_none() is None:
+            raise BookNotFound(details={"book_id": str(book_uid)})
+
+        upsert = pg_insert(ReviewModel).values(
+            review_text=review_data.review_text, rating=review_data.rating, book_uid=book_uid, user_uid=user_uid)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[ReviewModel.book_uid, ReviewModel.user_uid],
+            set_={"review_text": upsert.excluded.review_text, "rating": upsert.excluded.rating,
+                  "updated_at": upsert.excluded.updated_at},
+        ).returning(*ReviewModel.__table__.c).cte("upserted")
+        upserted = aliased(ReviewModel, upsert)
+        # Every part of one statement shares its snapshot, so this still sees the row as it was before
+        old_rating = (
+            select(ReviewModel.rating)
+            .where(ReviewModel.book_uid == book_uid, ReviewModel.user_uid == user_uid)
+            .scalar_subquery()
+        )
         try:
-            # use the injected services instead of global calls
-            book = await self.book_service.get_book(book_uid)
-            if not book:
-                raise HTTPException(
-                    detail="Book not found", status_code=status.HTTP_404_NOT_FOUND
-                )
-
-            user = await self.user_service.get_user_by_email(user_email)
-            if not user:
-                raise HTTPException(
-                    detail="User not found", status_code=status.HTTP_404_NOT_FOUND
-                )
-            # new_review = ReviewModel(**review_dict, user_uid=user.uid, book_uid=book.bid)
-            print(" New review book -----------", book.bid, book.title)
-            print(" New review user -----------", user)
-            new_review = ReviewModel(
-                review_text=review_data.review_text,
-                rating=review_data.rating,
-                book_uid=book.bid,
-                user_uid=user.uid
+            result = await self.db.execute(
+                select(upserted, old_rating.label("old_rating"))
+                .options(raiseload(upserted.book), raiseload(upserted.user))
             )
+        except IntegrityError as exc:
+            # The book row is locked above, so the only foreign key left to violate is the user's
+            logger.error(f"Failed to add Review: {exc}")
+            raise UserNotFound(details={"user_uid": str(user_uid)})
+        review, previous = result.one()
+
+        if previous is None:
+            await self._apply_rating_change(book_uid, {review.rating: 1})
+        elif previous != review.rating:
+            await self._apply_rating_change(book_uid, {previous: -1, review.rating: 1})
+        after_commit(self.db, book_cache.invalidate, book_uid)
+        return review
+
+    async def _lock_own_review(self, review_uid: uuid.UUID, user_uid: uuid.UUID):
+        """ (book_uid, rating) of a review the user wrote, row-locked so its rating cannot change underneath us.
+            Its book is locked first, in the order add_review_to_book and the review buffer lock them, so a
+            concurrent re-rating and delete of the same review cannot deadlock.
+        """
+        book_uid = await self.db.scalar(select(ReviewModel.book_uid).where(ReviewModel.uid == review_uid))
+        if book_uid is not None:
+            await self.db.execute(select(BookModel.bid).where(BookModel.bid == book_uid).with_for_update())
+        result = await self.db.execute(
+            select(ReviewModel.book_uid, ReviewModel.user_uid, ReviewModel.rating)
+            .where(ReviewModel.uid == review_uid)
+            .with_for_update()
+        )
+        review = result.one_or_none()
+        if not review:
+            raise ReviewNotFound(details={"review_uid": str(review_uid)})
+        if str(review.user_uid) != str(user_uid):
+            raise InsufficientPermission(details={"review_uid": str(review_uid)})
+        return review
+
+    async def update_review(self, review_uid: uuid.UUID, review_data: ReviewUpdate, user_uid: uuid.UUID) -> ReviewModel:
+        """ Edit the user's own review; a rating change moves one count between stars in the rollups """
+        old = await self._lock_own_review(review_uid, user_uid)
+        changes = review_data.model_dump(exclude_unset=True, exclude_none=True)
+        stmt = select(ReviewModel).where(ReviewModel.uid == review_uid)
+        if changes:
+            stmt = update(ReviewModel).where(ReviewModel.uid == review_uid).values(**changes).returning(ReviewModel)
+        result = await self.db.scalars(
+            stmt.options(raiseload(ReviewModel.book), raiseload(ReviewModel.user))
+            .execution_options(synchronize_session=False)
+        )
+        review = result.one()
+        if old.book_uid and review.rating != old.rating:
+            await self._apply_rating_change(old.book_uid, {old.rating: -1, review.rating: 1})
+        if old.book_uid:
+            after_commit(self.db, book_cache.invalidate, old.book_uid)
+        return review
+
+    async def delete_review(self, review_uid: uuid.UUID, user_uid: uuid.UUID) -> None:
+        """ Delete the user's own review and take it out of the book's rollups """
+        old = await self._lock_own_review(review_uid, user_uid)
+        await self.db.execute(
+            delete(ReviewModel).where(ReviewModel.uid == review_uid).execution_options(synchronize_session=False))
+        if old.book_uid:
+            await self._apply_rating_change(old.book_uid, {old.rating: -1})
+            after_commit(self.db, book_cache.invalidate, old.book_uid)
+
+    async def list_book_reviews(
+            self, book_uid: uuid.UUID, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[ReviewModel], Optional[str]]:
+        """ Reviews of a book, newest first, keyset-paginated on ix_reviews_book_uid_created_at_uid """
+        return await self._list_reviews(ReviewModel.book_uid == book_uid, limit, cursor)
+
+    async def list_user_reviews(
+            self, user_uid: uuid.UUID, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[ReviewModel], Optional[str]]:
+        """ Reviews written by a user, newest first, keyset-paginated on ix_reviews_user_uid_created_at_uid """
+        return await self._list_reviews(ReviewModel.user_uid == user_uid, limit, cursor)
+
+    async def _list_reviews(self, criterion, limit: int, cursor: Optional[str]) -> Tuple[List[ReviewModel], Optional[str]]:
+        """
+            - cursor: next_cursor of the previous page, encodes its last (created_at, uid)
+            - returns: (reviews, next_cursor); the book/user relationships are not loaded
+        """
+        stmt = (
+            select(ReviewModel)
+            .where(criterion)
+            .options(raiseload(ReviewModel.book), raiseload(ReviewModel.user))
+            .order_by(ReviewModel.created_at.desc(), ReviewModel.uid.desc())
+            .limit(limit + 1)
+        )
+        if cursor:
+            created_at, uid = decode_cursor(cursor, datetime.fromisoformat, uuid.UUID)
+            stmt = stmt.where(tuple_(ReviewModel.created_at, ReviewModel.uid) < (created_at, uid))
+
+        results = await self.db.scalars(stmt)
+        return split_page(results.all(), limit, lambda review: (review.created_at, review.uid))
 
-            print(" New review -----------",new_review)
-            # review.book_uid = book_uid
-            # review.user_email = user_email
-            self.db.add(new_review)
-            await self.db.flush()  # make sure PK is generated
-            await self.db.refresh(new_review)
-            return new_review
-        except Exception as e:
-            logger.error(f"Failed to add Review: {e}")
-            raise HTTPException(
-                detail="Oops... something went wrong!",
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
@@ -109,6 +109,16 @@ class BookNotFound(BookApiException):
         )
 
 
+class ReviewNotFound(BookApiException):
+    def __init__(self, details=None):
+        super().__init__(
+            message="Review not found",
+            error_code="review_not_found",
+            details=details,
+            status_code=status.HTTP_404_NOT_FOUND
+        )
+
+
 class TagNotFound(BookApiException):
     def __init__(self, details=None):
         super().__init__(
@@ -171,6 +181,39 @@ class PasswordNotMatch(BookApiException):
         )
 
 
+class InvalidCursor(BookApiException):
+    def __init__(self, details=None):
+        super().__init__(
+            message="Invalid pagination cursor",
+            error_code="invalid_cursor",
+            details=details,
+            resolution="Use the next_cursor value returned by the previous page or omit the cursor",
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+
+
+class PreconditionFailed(BookApiException):
+    def __init__(self, details=None):
+        super().__init__(
+            message="The resource was modified since it was fetched",
+            error_code="precondition_failed",
+            details=details,
+            resolution="Fetch the resource again and retry with its current ETag in If-Match",
+            status_code=status.HTTP_412_PRECONDITION_FAILED
+        )
+
+
+class ReviewBufferFull(BookApiException):
+    def __init__(self, details=None):
+        super().__init__(
+            message="Too many reviews are waiting to be written",
+            error_code="review_buffer_full",
+            details=details,
+            resolution="Retry the submission in a few seconds",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+
 # -------------------------
 # Exception Handlers
 # -------------------------
@@ -179,9 +222,10 @@ def register_exception_handlers(app: FastAPI):
 
     # 1️⃣ Domain Exceptions (BookApiException subclasses)
     domain_exceptions: list[Type[BookApiException]] = [
-        BookNotFound, UserNotFound, UserAlreadyExists, InvalidCredentials,
+        BookNotFound, ReviewNotFound, UserNotFound, UserAlreadyExists, InvalidCredentials,
         InvalidToken, RevokedToken, AccessTokenRequired, RefreshTokenRequired,
-        InsufficientPermission, TagNotFound, TagAlreadyExists, AccountNotVerified
+        InsufficientPermission, TagNotFound, TagAlreadyExists, AccountNotVerified,
+        InvalidCursor, PreconditionFailed, ReviewBufferFull
     ]
 
     for exc_class in domain_exceptions:
@@ -1,10 +1,19 @@
-from datetime import datetime, timezone
+import base64
+import binascii
+import hashlib
+import json
+import re
+from datetime import date, datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 from enum import Enum
+from typing import Any, Callable, Generic, List, Optional, Sequence, Tuple, TypeVar
 
 from itsdangerous import URLSafeTimedSerializer
+from pydantic import BaseModel
 from src.core.logger import logger
 
 from src.core.config import settings
+from src.shared.exception_handlers import InvalidCursor
 
 
 
@@ -20,8 +29,16 @@ class UserRole(str, Enum):
 
 ###################--------------------> Pydantic Schemas <-----------#######################
 
+T = TypeVar("T")
 
 
+class CursorPage(BaseModel, Generic[T]):
+    """ One page of a keyset-paginated listing.
+        - next_cursor: pass back as `cursor` to fetch the following page, None on the last page
+    """
+    items: List[T]
+    next_cursor: Optional[str] = None
+
 
 ###################--------------------> Utility Functions <-----------#######################
 
@@ -41,6 +58,27 @@ def now_utc_dt() -> datetime:
     return datetime.now(timezone.utc)
 
 
+_ISO_DATE = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})$")
+
+
+def parse_published_date(value: Any) -> date:
+    """
+        Parse a YYYY-MM-DD date, normalizing the unambiguous day/month swap seen in legacy data.
+        Example: "2011-21-01" -> date(2011, 1, 21); raises ValueError when no valid date can be read.
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    match = _ISO_DATE.match(str(value).strip())
+    if not match:
+        raise ValueError(f"invalid date '{value}', expected YYYY-MM-DD")
+    year, month, day = (int(part) for part in match.groups())
+    if month > 12 >= day:
+        month, day = day, month
+    return date(year, month, day)
+
+
 ###################--------------------> Itsdangerous Setup for Email Link<-----------#######################
 
 email_token_serializer = URLSafeTimedSerializer(
@@ -62,5 +100,104 @@ def decode_url_safe_token(token: str):
         logger.error(f"Failed to decode email url safe token: {exc}")
 
 
+###################--------------------> Keyset Pagination Cursor <-----------#######################
 
+def encode_cursor(*values: Any) -> str:
+    """
+        Encode the sort key of the last row of a page into an opaque url-safe cursor.
+        Example: encode_cursor(book.created_at, book.bid)
+    """
+    raw = json.dumps([v.isoformat() if hasattr(v, "isoformat") else str(v) for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *parsers: Callable[[str], Any]) -> list:
+    """
+        Decode a cursor produced by encode_cursor, converting each value with the matching parser.
+        Raises InvalidCursor if the cursor was tampered with or belongs to another listing.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("cursor arity mismatch")
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (ValueError, TypeError, binascii.Error) as exc:
+        raise InvalidCursor(details={"cursor": cursor, "reason": str(exc)})
 
+
+def split_page(rows: Sequence[T], limit: int, cursor_key: Callable[[T], Tuple[Any, ...]]) -> Tuple[Sequence[T], Optional[str]]:
+    """
+        Trim a `limit + 1` query result to one page and build the cursor for the next page.
+        Returns (page_rows, next_cursor); next_cursor is None when there are no more rows.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(*cursor_key(page[-1]))
+
+
+###################--------------------> Conditional Requests (ETag / Last-Modified) <-----------#######################
+
+def make_etag(*parts: Any, version: Optional[int] = None) -> str:
+    """
+        Build a strong ETag from the values that define a representation.
+        A row version, when given, is kept readable as a prefix so If-Match can be checked in SQL.
+        Example: make_etag("full", book.bid, book.updated_at, version=3) -> '"3-3f2a..."'
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    if version is not None:
+        return f'"{version}-{digest}"'
+    return f'"{digest}"'
+
+
+def if_match_versions(headers) -> Optional[List[int]]:
+    """
+        Row versions named by If-Match. None means no precondition (header absent or "*");
+        an empty list means nothing can match. Weak tags never match (strong comparison).
+    """
+    if_match = headers.get("if-match")
+    if if_match is None:
+        return None
+    tags = [tag.strip() for tag in if_match.split(",")]
+    if "*" in tags:
+        return None
+    versions = []
+    for tag in tags:
+        if len(tag) < 2 or not tag.startswith('"') or not tag.endswith('"'):
+            continue
+        version, separator, _ = tag[1:-1].partition("-")
+        if separator and version.isdigit():
+            versions.append(int(version))
+    return versions
+
+
+def conditional_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    """ ETag / Last-Modified response headers """
+    headers = {"ETag": etag}
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def is_not_modified(headers, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+        Evaluate If-None-Match / If-Modified-Since (RFC 9110): If-Modified-Since is
+        ignored when If-None-Match is present. True means answer 304 Not Modified.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have one-second resolution
+        return last_modified.replace(microsecond=0) <= since
+    return False
@@ -0,0 +1,192 @@
+import asyncio
+import bisect
+import hashlib
+import heapq
+import json
+import time
+import uuid
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from src.core.config import settings
+from src.core.logger import logger
+from src.db.redis import redis_client, RedisClient
+
+
+class TagEntry(NamedTuple):
+    uid: uuid.UUID
+    name: str
+    book_count: int
+
+
+class TagCache:
+    """ Process-local dictionary of tag names -> uid, so resolving tag names rarely touches Postgres.
+        - names are matched case-insensitively, like the uq_tags_lower_name index
+        - the same names sorted in one array serve prefix suggestions by bisection, ranked by usage
+        - names are loaded by TagService.warm_tag_cache at startup, and lazily again after an invalidation;
+          `loading` makes concurrent requests that find the dictionary stale wait for a single load
+        - usage counts come from a GROUP BY over book_tags that refresh_tag_usage runs in the background
+          every TAG_USAGE_REFRESH_INTERVAL, never on a request; reloading names keeps the last counts
+        - tag writes call invalidate() once they commit: the local copy is dropped and a message on
+          TAG_CACHE_CHANNEL makes every other worker drop theirs; listen() is that subscriber, started from
+          the app lifespan. Before the commit, workers reloading on that message would read the old tags.
+        - a copy older than TAG_CACHE_TTL is reloaded anyway, bounding staleness after a missed message
+        - names missing from the dictionary are looked up in Postgres by the caller, so a tag created
+          moments ago on another worker still resolves
+    """
+
+    def __init__(self, client: RedisClient):
+        self.client = client
+        self._ids: Optional[Dict[str, uuid.UUID]] = None
+        self._sorted_names: List[str] = []  # normalized, ascending
+        self._entries: List[TagEntry] = []  # aligned with _sorted_names
+        self._usage: Dict[uuid.UUID, int] = {}
+        self._loaded_at = 0.0
+        self.loading = asyncio.Lock()
+        self.generation = 0  # bumped on every invalidation, guards loads that raced with one
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        return name.lower()
+
+    def is_stale(self) -> bool:
+        return self._ids is None or time.monotonic() - self._loaded_at > settings.TAG_CACHE_TTL
+
+    def load(self, tags: Iterable, generation: Optional[int] = None) -> None:
+        """ Replace the dictionary with (uid, name) tags; skipped if invalidated since `generation` was read """
+        if generation is not None and generation != self.generation:
+            return
+        entries = sorted(
+            ((self.normalize(tag.name), TagEntry(tag.uid, tag.name, self._usage.get(tag.uid, 0))) for tag in tags),
+            key=lambda item: item[0],
+        )
+        self._sorted_names = [name for name, _ in entries]
+        self._entries = [entry for _, entry in entries]
+        self._ids = {name: entry.uid for name, entry in entries}
+        self._loaded_at = time.monotonic()
+
+    def set_usage(self, usage: Dict[uuid.UUID, int]) -> None:
+        """ Replace the books-per-tag counts suggestions are ranked by """
+        self._usage = usage
+        self._entries = [entry._replace(book_count=usage.get(entry.uid, 0)) for entry in self._entries]
+
+    def lookup(self, names: Iterable[str]) -> Tuple[Dict[str, uuid.UUID], List[str]]:
+        """ (uid of each name found, names the dictionary does not know) """
+        found, missing = {}, []
+        for name in names:
+            tag_id = self._ids.get(self.normalize(name)) if self._ids is not None else None
+            if tag_id is None:
+                missing.append(name)
+            else:
+                found[name] = tag_id
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def suggest(self, prefix: str, limit: int) -> List[TagEntry]:
+        """ Most used tags whose name starts with prefix (case-insensitive), ties by name.
+            Two bisections find the matching slice; only that slice is ranked.
+        """
+        prefix = self.normalize(prefix)
+        if not prefix:
+            return []
+        start = bisect.bisect_left(self._sorted_names, prefix)
+        # Names cut to the prefix length stay sorted, so the matching ones end where that cut passes prefix
+        end = bisect.bisect_right(self._sorted_names, prefix, lo=start, key=lambda name: name[:len(prefix)])
+        return heapq.nsmallest(
+            limit, self._entries[start:end], key=lambda entry: (-entry.book_count, self.normalize(entry.name)))
+
+    def clear(self) -> None:
+        self._ids = None
+        self._sorted_names, self._entries = [], []
+        self.generation += 1
+
+    async def invalidate(self) -> None:
+        """ Drop the dictionary here and, through Redis pub/sub, in every other worker """
+        self.clear()
+        try:
+            await self.client.publish(settings.TAG_CACHE_CHANNEL, "invalidate")
+        except Exception as exc:
+            self.errors += 1
+            logger.error(f"Tag cache invalidation publish failed: {exc}")
+
+    async def listen(self) -> None:
+        """ Clear the dictionary on every invalidation message; runs until cancelled """
+        while True:
+            try:
+                async for _ in self.client.subscribe(settings.TAG_CACHE_CHANNEL):
+                    # Also on (re)subscribe: messages published while disconnected are lost
+                    self.clear()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.errors += 1
+                logger.warning(f"Tag cache subscription lost, retrying: {exc}")
+                await asyncio.sleep(1)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._ids) if self._ids is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class TagFacetCache:
+    """ Books-per-tag counts in Redis, one hash holding a field per scope (unscoped, or a search/filter set).
+        - the hash expires TAG_FACETS_TTL after it is first written, scoped counts are never older than that
+        - tag assignment, tag writes and book deletes invalidate() the whole hash with one DEL, after commit
+        - Redis failures are logged and treated as misses, never as request errors
+    """
+    KEY = "tag_facets:v1"
+
+    def __init__(self, client: RedisClient):
+        self.client = client
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def scope(**params) -> str:
+        """ Hash field of a facet scope; 'all' when no search or filter is set """
+        params = {name: value for name, value in params.items() if value is not None}
+        if not params:
+            return "all"
+        return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:32]
+
+    async def get(self, scope: str) -> Optional[str]:
+        try:
+            payload = await self.client.hash_get(self.KEY, scope)
+        except Exception as exc:
+            self.errors += 1
+            logger.warning(f"Tag facet cache read failed for {scope}: {exc}")
+            return None
+        if payload is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return payload
+
+    async def set(self, scope: str, payload: str) -> None:
+        try:
+            await self.client.hash_set(self.KEY, scope, payload, settings.TAG_FACETS_TTL)
+        except Exception as exc:
+            self.errors += 1
+            logger.warning(f"Tag facet cache write failed for {scope}: {exc}")
+
+    async def invalidate(self) -> None:
+        try:
+            await self.client.delete_keys(self.KEY)
+        except Exception as exc:
+            self.errors += 1
+            logger.error(f"Tag facet cache invalidation failed: {exc}")
+
+
+# Create global instances | the dictionary and counters are per worker process
+tag_cache = TagCache(redis_client)
+tag_facet_cache = TagFacetCache(redis_client)
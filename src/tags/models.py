@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 from typing import List, TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, String, TIMESTAMP, func
+from sqlalchemy import ForeignKey, Index, String, TIMESTAMP, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -15,9 +15,15 @@ if TYPE_CHECKING:
 # ---------- Association Table ----------
 class BookTagModel(Base):
     __tablename__ = 'book_tags'
+    __table_args__ = (
+        # Reverse of the primary key: books of a tag, index-only for the tag filters of GET /books
+        Index("ix_book_tags_tag_id_book_id", "tag_id", "book_id"),
+    )
 
-    book_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey('books.bid'), primary_key=True)
-    tag_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey('tags.uid'), primary_key=True)
+    book_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey('books.bid', ondelete="CASCADE"), primary_key=True)
+    tag_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey('tags.uid', ondelete="CASCADE"), primary_key=True)
 
 
 # ---------- Tag Model ----------
@@ -36,9 +42,12 @@ class TagModel(Base):
     books: Mapped[List["BookModel"]] = relationship(
         secondary="book_tags",
         back_populates="tags",
-        lazy="selectin",
+        lazy="raise",
     )
 
     def __repr__(self):
         return f"<Tag {self.name}>"
 
+
+# Tag names are unique regardless of case; also serves the case-insensitive name lookups
+Index("uq_tags_lower_name", func.lower(TagModel.name), unique=True)
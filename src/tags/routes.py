@@ -1,16 +1,19 @@
 import uuid
-from typing import List
-from fastapi import APIRouter, status, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Query, status, HTTPException
 
 from src.auth.dependencies import get_role_checker_dep
+from src.books.dependencies import BookFilterDep
 from src.books.models import BookModel
 from src.books.schemas import BookResponse
 from src.shared.exception_handlers import TagAlreadyExists, TagNotFound, BookNotFound
 from src.shared.utils import UserRole
+from src.tags.cache import tag_cache
 from src.tags.dependencies import TagServiceDep
-from src.tags.schemas import TagResponse, TagCreate, TagAdd
+from src.tags.schemas import TagResponse, TagCreate, TagAdd, TagFacet
 
 role_checker_dep = get_role_checker_dep([UserRole.user, UserRole.admin, UserRole.superadmin])
+admin_checker_dep = get_role_checker_dep([UserRole.admin, UserRole.superadmin])
 tags_router = APIRouter(dependencies=[role_checker_dep])
 
 
@@ -27,6 +30,31 @@ async def create_tag(tag_data: TagCreate, tag_service: TagServiceDep):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tag already exists")
 
 
+@tags_router.get("/facets", response_model=List[TagFacet], status_code=status.HTTP_200_OK)
+async def get_tag_facets(
+        tag_service: TagServiceDep,
+        filters: BookFilterDep,
+        q: Optional[str] = Query(None, min_length=1, max_length=200),
+):
+    """ Number of books per tag, optionally within a search (q) and the catalogue filters of GET /books """
+    return await tag_service.get_tag_facets(q=q, filters=filters)
+
+
+@tags_router.get("/suggest", response_model=List[TagFacet], status_code=status.HTTP_200_OK)
+async def suggest_tags(
+        tag_service: TagServiceDep,
+        prefix: str = Query(..., min_length=1, max_length=100),
+        limit: int = Query(10, ge=1, le=50),
+):
+    """ Tag autocomplete: up to limit tags starting with prefix, most used first, without their books """
+    return await tag_service.suggest_tags(prefix, limit)
+
+
+@tags_router.get("/cache/stats", dependencies=[admin_checker_dep], status_code=status.HTTP_200_OK)
+async def get_tag_cache_stats() -> dict:
+    return tag_cache.stats()
+
+
 @tags_router.get("/{tag_uid}", response_model=TagResponse)
 async def get_single_tag(tag_uid: uuid.UUID, tag_service: TagServiceDep):
     tag = await tag_service.get_tag(tag_uid)
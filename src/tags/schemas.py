@@ -15,4 +15,12 @@ class TagResponse(BaseModel):
     name: str
     created_at: datetime
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TagFacet(BaseModel):
+    uid: uuid.UUID
+    name: str
+    book_count: int  # books carrying the tag, within the requested scope
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,14 +1,25 @@
+import asyncio
+import json
 import uuid
-from typing import List
+from typing import Dict, Iterable, List
 from typing import Optional, Sequence
-from sqlalchemy import select, desc
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, select, desc
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import raiseload
 
+from src.books.cache import book_cache
 from src.books.models import BookModel
-from src.books.service import BookService
+from src.books.schemas import BookFilter
+from src.books.service import BookService, apply_book_filters
+from src.core.config import settings
+from src.core.logger import logger
+from src.db.session import after_commit, explicit_refresh
 from src.shared.exception_handlers import BookNotFound, TagNotFound, TagAlreadyExists
-from src.tags.models import TagModel
-from src.tags.schemas import TagResponse, TagAdd, TagCreate
+from src.tags.cache import tag_cache, tag_facet_cache
+from src.tags.models import TagModel, BookTagModel
+from src.tags.schemas import TagResponse, TagAdd, TagCreate, TagFacet
 from src.user.schemas import UserID
 
 
@@ -18,28 +29,32 @@ class TagService:
         self.book_service = book_service
 
     async def list_tags(self) -> Sequence[TagModel]:
-        """Get all tags"""
-        stmt = select(TagModel).order_by(TagModel.created_at.desc())
+        """Get all tags, without the books of each"""
+        stmt = select(TagModel).options(raiseload(TagModel.books)).order_by(TagModel.created_at.desc())
         result = await self.db.execute(stmt)
         return result.scalars().all()
 
     async def get_tag(self, tag_id: uuid.UUID) -> Optional[TagModel]:
-        """Get a tag by id"""
-        stmt = select(TagModel).where(TagModel.uid == tag_id)
+        """Get a tag by id, without its books"""
+        stmt = select(TagModel).where(TagModel.uid == tag_id).options(raiseload(TagModel.books))
         result = await self.db.execute(stmt)
         return result.scalar_one_or_none()
 
     async def create_tag(self, tag_data: TagCreate) -> TagModel:
-        """Create a new tag"""
-        stmt = select(TagModel).where(TagModel.name == tag_data.name)
-        result = await self.db.execute(stmt)
-        existing_tag = result.scalars().first()
-        if existing_tag:
-            raise TagAlreadyExists(details={"name": existing_tag.name})
-        new_tag = TagModel(name=tag_data.name)
-        self.db.add(new_tag)
-        await self.db.flush()
-        await self.db.refresh(new_tag)
+        """ Create a new tag. The unique index on lower(name) decides whether it exists,
+            so two concurrent creates of the same name cannot both succeed.
+        """
+        stmt = (
+            pg_insert(TagModel)
+            .values(name=tag_data.name)
+            .on_conflict_do_nothing()
+            .returning(TagModel)
+            .options(raiseload(TagModel.books))
+        )
+        new_tag = (await self.db.scalars(stmt)).one_or_none()
+        if new_tag is None:
+            raise TagAlreadyExists(details={"name": tag_data.name})
+        after_commit(self.db, tag_cache.invalidate)
         return new_tag
 
     async def update_tag(self, tag_uid: uuid.UUID, tag_data: TagCreate) -> TagModel:
@@ -51,42 +66,152 @@ class TagService:
         for key, value in tag_data.model_dump().items():
             setattr(tag, key, value)
 
-        await self.db.flush()
-        await self.db.refresh(tag)
+        try:
+            await self.db.flush()
+        except IntegrityError:
+            raise TagAlreadyExists(details={"name": tag_data.name})
+        await explicit_refresh(self.db, tag)
+        await self._invalidate_tagged_books(tag_uid)
+        after_commit(self.db, tag_cache.invalidate)
+        after_commit(self.db, tag_facet_cache.invalidate)
         return tag
 
     async def delete_tag(self, tag_uid: uuid.UUID) -> bool:
-        """Delete a tag"""
-        tag = await self.get_tag(tag_uid)
-        if not tag:
+        """ One DELETE ... RETURNING; its book_tags rows cascade, so tag.books is never loaded """
+        await self._invalidate_tagged_books(tag_uid)
+        result = await self.db.execute(
+            delete(TagModel).where(TagModel.uid == tag_uid).returning(TagModel.uid)
+            .execution_options(synchronize_session=False)
+        )
+        if result.scalar_one_or_none() is None:
             raise TagNotFound(details={"tag_uid": tag_uid})
-
-        await self.db.delete(tag)
+        after_commit(self.db, tag_cache.invalidate)
+        after_commit(self.db, tag_facet_cache.invalidate)
         return True
 
+    async def _invalidate_tagged_books(self, tag_uid: uuid.UUID) -> None:
+        """Drop cached payloads of every book embedding this tag"""
+        result = await self.db.execute(select(BookTagModel.book_id).where(BookTagModel.tag_id == tag_uid))
+        after_commit(self.db, book_cache.invalidate, *result.scalars().all())
+
+    async def warm_tag_cache(self) -> None:
+        """ (Re)load the tag names from list_tags. Requests that find the dictionary stale together
+            wait for one load instead of each running their own.
+        """
+        async with tag_cache.loading:
+            if not tag_cache.is_stale():
+                return  # loaded while this request waited
+            generation = tag_cache.generation
+            tags = await self.list_tags()
+            tag_cache.load(tags, generation)
+
+    async def refresh_tag_usage(self) -> None:
+        """ Recount books per tag for suggestion ranking: one GROUP BY over all of book_tags """
+        usage = await self.db.execute(select(BookTagModel.tag_id, func.count()).group_by(BookTagModel.tag_id))
+        tag_cache.set_usage(dict(usage.all()))
+
+    async def suggest_tags(self, prefix: str, limit: int) -> List[TagFacet]:
+        """ Autocomplete: the most used tags starting with prefix, answered from the in-process tag cache.
+            Usage counts lag by up to TAG_USAGE_REFRESH_INTERVAL.
+        """
+        if tag_cache.is_stale():
+            await self.warm_tag_cache()
+        return [TagFacet.model_validate(entry._asdict()) for entry in tag_cache.suggest(prefix, limit)]
+
+    async def resolve_tag_ids(self, names: Sequence[str]) -> Dict[str, uuid.UUID]:
+        """ uid of each name that exists, matched case-insensitively. Served from the tag dictionary
+            cache; only names it does not know (e.g. just created on another worker) query Postgres.
+        """
+        if tag_cache.is_stale():
+            await self.warm_tag_cache()
+        tag_ids, missing = tag_cache.lookup(names)
+        if missing:
+            result = await self.db.execute(
+                select(TagModel.name, TagModel.uid)
+                .where(func.lower(TagModel.name).in_({tag_cache.normalize(name) for name in missing}))
+            )
+            found = {tag_cache.normalize(name): uid for name, uid in result.all()}
+            tag_ids.update({name: found[tag_cache.normalize(name)] for name in missing
+                            if tag_cache.normalize(name) in found})
+        return tag_ids
+
+    async def require_tag_ids(self, names: Iterable[str]) -> Dict[str, uuid.UUID]:
+        """ Like resolve_tag_ids, but one TagNotFound lists every name that does not exist """
+        names = list(dict.fromkeys(names))
+        tag_ids = await self.resolve_tag_ids(names)
+        unknown = [name for name in names if name not in tag_ids]
+        if unknown:
+            raise TagNotFound(details={"tag_names": unknown})
+        return tag_ids
+
     async def add_tag_to_book(self, book_id: uuid.UUID, tag_data: TagAdd) -> BookModel:
-        """Add tags to a book"""
-        # Fetch book
+        """ Add tags to a book in a constant number of statements, however many tags are sent:
+            1. resolve every name through require_tag_ids; unknown names are reported together
+            2. one INSERT INTO book_tags ... SELECT from the book row, ON CONFLICT DO NOTHING, so tags
+               the book already has are skipped and the book_tags collection is never loaded
+            3. load the book for the response
+        """
+        tag_ids = await self.require_tag_ids(tag_item.name for tag_item in tag_data.tags)
+
+        if tag_ids:
+            # Selecting through books inserts nothing for a missing book instead of violating the FK
+            await self.db.execute(
+                pg_insert(BookTagModel)
+                .from_select(
+                    ["book_id", "tag_id"],
+                    select(BookModel.bid, TagModel.uid)
+                    .where(BookModel.bid == book_id, TagModel.uid.in_(tag_ids.values())),
+                )
+                .on_conflict_do_nothing()
+            )
+
         book = await self.book_service.get_book(book_id)
         if not book:
             raise BookNotFound(details={"book_id": book_id})
-
-        # Process tag list
-        for tag_item in tag_data.tags:
-            stmt = select(TagModel).where(TagModel.name == tag_item.name)
-            tag_result = await self.db.execute(stmt)
-            tag = tag_result.scalars().first()
-            if not tag:
-                # If not tag is create one and assign but the problem is typo error with tags
-                # tag = TagModel(name=tag_item.name)
-                # self.db.add(tag)
-                # await self.db.flush()
-                # await self.db.refresh(tag)
-                raise TagNotFound(details={"tag_name": tag_item.name})
-
-            book.tags.append(tag) # This line updates the relationship table (usually BookTagModel).
-
-        await self.db.flush()
-        await self.db.refresh(book)
+        after_commit(self.db, book_cache.invalidate, book_id)
+        after_commit(self.db, tag_facet_cache.invalidate)
         return book
 
+    async def get_tag_facets(self, q: Optional[str] = None, filters: Optional[BookFilter] = None) -> List[TagFacet]:
+        """ Books per tag, most used first, from one GROUP BY tag_id over book_tags; never loads tag.books.
+            - q / filters: count only the books matching the search (as GET /books/search) and the catalogue
+              filters (as GET /books); without them every book counts
+            - served from the Redis facet cache, per scope, for up to TAG_FACETS_TTL
+        """
+        filter_params = filters.model_dump(exclude_none=True) if filters else {}
+        scope = tag_facet_cache.scope(q=q, **filter_params)
+        cached = await tag_facet_cache.get(scope)
+        if cached is not None:
+            return [TagFacet.model_validate(item) for item in json.loads(cached)]
+
+        counts = select(BookTagModel.tag_id, func.count().label("book_count")).group_by(BookTagModel.tag_id)
+        if q is not None or filter_params:
+            books = apply_book_filters(select(BookModel.bid), filters)
+            if q is not None:
+                query = func.websearch_to_tsquery(settings.SEARCH_LANGUAGE, q)
+                books = books.where(BookModel.search_vector.bool_op("@@")(query))
+            counts = counts.where(BookTagModel.book_id.in_(books))
+        counts = counts.subquery("counts")
+        result = await self.db.execute(
+            select(TagModel.uid, TagModel.name, counts.c.book_count)
+            .join(counts, counts.c.tag_id == TagModel.uid)
+            .order_by(counts.c.book_count.desc(), TagModel.name)
+        )
+        facets = [TagFacet.model_validate(row) for row in result.all()]
+        await tag_facet_cache.set(scope, json.dumps([facet.model_dump(mode="json") for facet in facets]))
+        return facets
+
+
+async def refresh_tag_usage_periodically(session_factory: async_sessionmaker[AsyncSession]) -> None:
+    """ Background task started from the app lifespan: refresh_tag_usage now, then every
+        TAG_USAGE_REFRESH_INTERVAL; runs until cancelled
+    """
+    while True:
+        try:
+            async with session_factory() as session:
+                await TagService(session, BookService(session)).refresh_tag_usage()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning(f"Tag usage refresh failed, suggestions keep the previous counts: {exc}")
+        await asyncio.sleep(settings.TAG_USAGE_REFRESH_INTERVAL)
@@ -0,0 +1,122 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+from src.core.config import settings
+from src.core.logger import logger
+from src.db.redis import redis_client, RedisClient
+from src.user.schemas import Principal
+
+
+class PrincipalGeneration(NamedTuple):
+    """ Invalidation state read before a principal is loaded from Postgres """
+    local: int  # forget() calls in this process so far
+    shared: str  # principal:v1:{email}:generation in Redis, "" before the first invalidation
+
+
+class PrincipalCache:
+    """ Authenticated-user snapshots, so get_current_user skips Postgres on a warm path.
+        - in-process LRU of at most PRINCIPAL_CACHE_SIZE entries, each trusted for PRINCIPAL_CACHE_LOCAL_TTL
+        - backed by Redis (principal:v1:{email}, PRINCIPAL_CACHE_TTL) so workers share what one has loaded
+        - UserService calls invalidate() after changing a user: the Redis entry is deleted and a message on
+          PRINCIPAL_CACHE_CHANNEL drops the in-process copy in every worker; listen() is that subscriber
+        - invalidate() also bumps a per-email generation in Redis; set() only stores a principal whose load
+          started at the current generation, so a load that read the row before the change is not cached
+        - Redis failures are logged and treated as misses, never as request errors
+    """
+
+    def __init__(self, client: RedisClient):
+        self.client = client
+        self._local: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self._forgotten = 0  # bumped by every forget(), guards loads that raced with one
+
+    @staticmethod
+    def key(email: str) -> str:
+        return f"principal:v1:{email}"
+
+    @staticmethod
+    def generation_key(email: str) -> str:
+        return f"principal:v1:{email}:generation"
+
+    def _remember(self, principal: Principal) -> None:
+        self._local[principal.email] = (time.monotonic() + settings.PRINCIPAL_CACHE_LOCAL_TTL, principal)
+        self._local.move_to_end(principal.email)
+        while len(self._local) > settings.PRINCIPAL_CACHE_SIZE:
+            self._local.popitem(last=False)
+
+    def forget(self, email: Optional[str] = None) -> None:
+        """ Drop one in-process entry, or all of them """
+        self._forgotten += 1
+        if email is None:
+            self._local.clear()
+        else:
+            self._local.pop(email, None)
+
+    async def get(self, email: str) -> Optional[Principal]:
+        entry = self._local.get(email)
+        if entry is not None:
+            expires_at, principal = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(email)
+                return principal
+            del self._local[email]
+        try:
+            raw = await self.client.get_value(self.key(email))
+            principal = Principal.model_validate_json(raw) if raw is not None else None
+        except Exception as exc:
+            logger.warning(f"Principal cache read failed for {email}: {exc}")
+            return None
+        if principal is not None:
+            self._remember(principal)
+        return principal
+
+    async def generation(self, email: str) -> Optional[PrincipalGeneration]:
+        """ Read before loading the user from Postgres and pass to set(); None if Redis is unavailable """
+        local = self._forgotten
+        try:
+            shared = await self.client.get_value(self.generation_key(email))
+        except Exception as exc:
+            logger.warning(f"Principal cache generation read failed for {email}: {exc}")
+            return None
+        return PrincipalGeneration(local, shared or "")
+
+    async def set(self, principal: Principal, generation: Optional[PrincipalGeneration]) -> None:
+        """ Cache a principal loaded after generation() returned `generation`; skipped if invalidated since """
+        if generation is None or generation.local != self._forgotten:
+            return
+        try:
+            stored = await self.client.set_value_if(
+                self.key(principal.email), principal.model_dump_json(), settings.PRINCIPAL_CACHE_TTL,
+                self.generation_key(principal.email), generation.shared)
+        except Exception as exc:
+            logger.warning(f"Principal cache write failed for {principal.email}: {exc}")
+            return
+        if stored and generation.local == self._forgotten:
+            self._remember(principal)
+
+    async def invalidate(self, email: str) -> None:
+        self.forget(email)
+        try:
+            await self.client.bump_and_delete(
+                [self.generation_key(email)], settings.PRINCIPAL_CACHE_TTL, self.key(email))
+            await self.client.publish(settings.PRINCIPAL_CACHE_CHANNEL, email)
+        except Exception as exc:
+            logger.error(f"Principal cache invalidation failed for {email}: {exc}")
+
+    async def listen(self) -> None:
+        """ Drop in-process entries as other workers invalidate them; runs until cancelled """
+        while True:
+            try:
+                async for email in self.client.subscribe(settings.PRINCIPAL_CACHE_CHANNEL):
+                    # "" on (re)subscribe: messages published while disconnected are lost, start clean
+                    self.forget(email or None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning(f"Principal cache subscription lost, retrying: {exc}")
+                await asyncio.sleep(1)
+
+
+# Create global instance | the LRU is per worker process
+principal_cache = PrincipalCache(redis_client)
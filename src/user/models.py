@@ -35,11 +35,11 @@ class UserModel(Base):
     )
     # Relationships
     books: Mapped[List["BookModel"]] = relationship(
-        back_populates="user", lazy="selectin",
+        back_populates="user", lazy="raise",
         cascade="save-update", passive_deletes=True
     )
     reviews: Mapped[List["ReviewModel"]] = relationship(
-        back_populates="user", lazy="selectin",
+        back_populates="user", lazy="raise",
         cascade="save-update", passive_deletes=True
     )
 
@@ -55,6 +55,17 @@ class UserID(BaseModel):
     uid: uuid.UUID
 
 
+class Principal(BaseModel):
+    """ Slim snapshot of the authenticated user: all get_current_user and RoleChecker need """
+    uid: uuid.UUID
+    email: EmailStr
+    role: UserRole
+    is_active: bool
+    is_verified: bool
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class UserLogin(BaseModel):
     email: EmailStr = Field(..., min_length=1, max_length=30)
     password: str = Field(..., min_length=6)
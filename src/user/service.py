@@ -3,9 +3,13 @@ from typing import Optional
 from pydantic import EmailStr
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from src.auth.schemas import PasswordResetConfirm
 from src.core.security import get_hash_password, verify_password
+from src.db.session import explicit_refresh
+from src.user.cache import principal_cache
 from src.user.models import UserModel
 from src.user.schemas import UserCreate, UserUpdate, UserID
 
@@ -27,6 +31,13 @@ class UserService:
         )
         return result.scalar_one_or_none()
 
+    async def get_user_profile(self, user_id: uuid.UUID) -> Optional[UserModel]:
+        """ A user with the books MeResponse lists; the books' own relationships stay unloaded """
+        result = await self.db.execute(
+            select(UserModel).where(UserModel.uid == user_id).options(selectinload(UserModel.books))
+        )
+        return result.scalar_one_or_none()
+
     async def check_user_exists(self, user_email: EmailStr) -> bool:
         existing_user = await self.get_user_by_email(user_email)
         return True if existing_user is not None else False
@@ -48,7 +59,10 @@ class UserService:
         )
         self.db.add(new_user)
         await self.db.flush()  # just flush (no commit needed)
-        await self.db.refresh(new_user)
+        await explicit_refresh(self.db, new_user)
+        # A new user owns nothing yet: mark the collections loaded instead of querying them
+        set_committed_value(new_user, "books", [])
+        set_committed_value(new_user, "reviews", [])
         return new_user
 
     async def update_user(self, user_data: UserUpdate) -> Optional[UserModel]:
@@ -59,7 +73,8 @@ class UserService:
         for field, value in user_data.model_dump(exclude_unset=True).items():
             setattr(user, field, value)
         await self.db.commit()
-        await self.db.refresh(user)
+        await explicit_refresh(self.db, user)
+        await principal_cache.invalidate(user.email)
         return user
 
     async def delete_user(self, user_id: UserID) -> bool | None:
@@ -67,8 +82,10 @@ class UserService:
         user = result.scalar_one_or_none()
         if not user:
             return None
+        email = user.email  # expired by the commit, which leaves nothing to reload it from
         await self.db.delete(user)
         await self.db.commit()
+        await principal_cache.invalidate(email)
         return True
 
     async def mark_user_verified(self, user_id: uuid.UUID) -> bool | None:
@@ -76,11 +93,13 @@ class UserService:
         user.is_verified = True
         user.is_active = True
         await self.db.commit()
-        await self.db.refresh(user)
+        await explicit_refresh(self.db, user)
+        await principal_cache.invalidate(user.email)
 
     async def reset_user_password(self, user: UserModel, password: PasswordResetConfirm) -> bool:
         user.hashed_password = get_hash_password(password.new_password)
         await self.db.commit()
-        await self.db.refresh(user)
+        await explicit_refresh(self.db, user)
+        await principal_cache.invalidate(user.email)
         return True
 
@@ -1,16 +1,22 @@
+import asyncio
 import pytest
 import uuid
 from unittest.mock import MagicMock, AsyncMock
 from fastapi.testclient import TestClient
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
 from src.main import app
+from src.core.config import settings
+from src.db.base import Base
 from src.db.session import get_db_session
-from src.auth.dependencies import get_current_user, get_auth_service, AccessTokenBearer, RefreshTokenBearer
+from src.auth.dependencies import get_current_user, get_auth_service, AccessTokenBearer, RefreshTokenBearer, AccessTokenDep
 from src.user.dependencies import get_user_service
 from src.books.dependencies import get_book_service
 from src.reviews.dependencies import get_review_service
 from src.tags.dependencies import get_tag_service
 from src.db.redis import redis_client
+from src.books.books_date import books as sample_book_records
 
 
 # ============================================================
@@ -71,6 +77,15 @@ def mock_current_user():
     return _mock_current_user
 
 
+@pytest.fixture
+def token_payload(mock_current_user):
+    """ Decoded access token of the mock user; routes depend on an AccessTokenBearer instance """
+    payload = {"user": {"uid": str(mock_current_user.uid), "email": mock_current_user.email}, "refresh": False}
+    app.dependency_overrides[AccessTokenDep.dependency] = lambda: payload
+    yield payload
+    app.dependency_overrides.pop(AccessTokenDep.dependency)
+
+
 # ============================================================
 # 3. DEPENDENCY OVERRIDES
 # ============================================================
@@ -174,6 +189,48 @@ def fake_book():
     }
 
 
+@pytest.fixture
+def sample_books():
+    return [dict(record) for record in sample_book_records]
+
+
+# ============================================================
+# 8. REAL DATABASE (loader options, statement events)
+# ============================================================
+
+@pytest.fixture
+def run_in_database():
+    """ Run `await scenario(session)` against the Postgres at DATABASE_URL, inside a transaction that is
+        rolled back afterwards; service commits only release a savepoint. Skipped without a reachable database.
+    """
+    if not settings.DATABASE_URL:
+        pytest.skip("DATABASE_URL is not set")
+
+    async def run(scenario):
+        engine = create_async_engine(settings.DATABASE_URL)
+        try:
+            try:
+                connection = await engine.connect()
+            except (OSError, DBAPIError) as exc:
+                pytest.skip(f"Postgres is not reachable: {exc}")
+            async with connection:
+                await connection.begin()
+                await connection.run_sync(Base.metadata.create_all)
+                session = AsyncSession(
+                    bind=connection, expire_on_commit=False, autoflush=False,
+                    join_transaction_mode="create_savepoint",
+                )
+                try:
+                    return await scenario(session)
+                finally:
+                    await session.close()
+                    await connection.rollback()
+        finally:
+            await engine.dispose()
+
+    return lambda scenario: asyncio.run(run(scenario))
+
+
 
 # def test_signup_success(client, mock_user_service, mock_auth_service):
 #     mock_user_service.check_user_exists.return_value = False
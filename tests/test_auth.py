@@ -1,4 +1,15 @@
-from unittest.mock import patch
+import asyncio
+import datetime
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.auth.dependencies import get_current_user
+from src.core.config import settings
+from src.shared.utils import UserRole
+from src.user.cache import PrincipalCache, PrincipalGeneration
+from src.user.schemas import Principal
+from src.user.service import UserService
 
 auth_prefix = "/api/v1/auth"
 
@@ -60,3 +71,126 @@ def test_signup_success(client, mock_user_service, mock_auth_service):
     mock_user_service.check_user_exists.assert_called_once_with("new@example.com")
     mock_user_service.create_user.assert_called_once()
     mock_auth_service.send_verification_email.assert_awaited_once_with(mock_user)
+
+
+# Test /me endpoint
+def test_me_loads_profile_with_books(client, mock_user_service, mock_current_user):
+    profile = SimpleNamespace(
+        uid=mock_current_user.uid,
+        username="testuser",
+        email=mock_current_user.email,
+        first_name="Test",
+        last_name="User",
+        is_verified=True,
+        is_active=True,
+        created_at=datetime.datetime.now(),
+        updated_at=datetime.datetime.now(),
+        role=SimpleNamespace(value="admin"),
+        books=[]
+    )
+    mock_user_service.get_user_profile.return_value = profile
+
+    response = client.get(f"{auth_prefix}/me")
+
+    assert response.status_code == 200
+    assert response.json()["books"] == []
+    mock_user_service.get_user_profile.assert_awaited_once_with(mock_current_user.uid)
+
+
+def test_me_rejects_cached_principal_of_deleted_user(client, mock_user_service, mock_current_user, monkeypatch):
+    invalidate = AsyncMock()
+    monkeypatch.setattr("src.auth.routes.principal_cache.invalidate", invalidate)
+    monkeypatch.setattr(mock_user_service.get_user_profile, "return_value", None)  # shared mock, restored after
+
+    response = client.get(f"{auth_prefix}/me")
+
+    assert response.status_code == 403
+    invalidate.assert_awaited_once_with(mock_current_user.email)
+
+
+# Test the principal cache behind get_current_user
+def _principal(email="reader@example.com"):
+    return Principal(uid=uuid.uuid4(), email=email, role=UserRole.user, is_active=True, is_verified=True)
+
+
+def test_current_user_warm_path_skips_database(monkeypatch):
+    cache = PrincipalCache(MagicMock(get_value=AsyncMock(return_value=None), set_value_if=AsyncMock(return_value=True)))
+    monkeypatch.setattr("src.auth.dependencies.principal_cache", cache)
+    principal = _principal()
+    user_service = MagicMock(get_user_by_email=AsyncMock(return_value=principal))
+    payload = {"user": {"email": principal.email}}
+
+    assert asyncio.run(get_current_user(user_service, payload)) == principal  # cold: one query, then cached
+    assert asyncio.run(get_current_user(user_service, payload)) == principal
+
+    user_service.get_user_by_email.assert_awaited_once_with(principal.email)
+    cache.client.set_value_if.assert_awaited_once()
+    assert cache.client.get_value.await_count == 2  # entry and generation on the cold call; the warm one stayed local
+
+
+def test_principal_cache_reads_redis_then_bounds_local_copies(monkeypatch):
+    first, second = _principal("first@example.com"), _principal("second@example.com")
+    cache = PrincipalCache(MagicMock(get_value=AsyncMock(return_value=first.model_dump_json()),
+                                     set_value_if=AsyncMock(return_value=True)))
+    monkeypatch.setattr(settings, "PRINCIPAL_CACHE_SIZE", 1)
+
+    assert asyncio.run(cache.get(first.email)) == first  # from Redis, kept locally
+    asyncio.run(cache.set(second, PrincipalGeneration(0, "")))
+
+    assert list(cache._local) == [second.email]  # least recently used entry evicted
+
+
+def test_principal_cache_local_entries_expire(monkeypatch):
+    principal = _principal()
+    cache = PrincipalCache(MagicMock(get_value=AsyncMock(return_value=None), set_value_if=AsyncMock(return_value=True)))
+    monkeypatch.setattr(settings, "PRINCIPAL_CACHE_LOCAL_TTL", -1)
+    asyncio.run(cache.set(principal, PrincipalGeneration(0, "")))
+
+    assert asyncio.run(cache.get(principal.email)) is None
+    cache.client.get_value.assert_awaited_once()
+
+
+def test_verifying_user_invalidates_principal_everywhere(monkeypatch):
+    principal = _principal()
+    cache = PrincipalCache(MagicMock(set_value_if=AsyncMock(return_value=True), bump_and_delete=AsyncMock(),
+                                     publish=AsyncMock()))
+    monkeypatch.setattr("src.user.service.principal_cache", cache)
+    asyncio.run(cache.set(principal, PrincipalGeneration(0, "")))
+    db = MagicMock(commit=AsyncMock(), refresh=AsyncMock())
+    service = UserService(db)
+    service.get_user_by_id = AsyncMock(return_value=MagicMock(email=principal.email))
+
+    asyncio.run(service.mark_user_verified(principal.uid))
+
+    assert principal.email not in cache._local
+    cache.client.bump_and_delete.assert_awaited_once_with(
+        [PrincipalCache.generation_key(principal.email)], settings.PRINCIPAL_CACHE_TTL,
+        PrincipalCache.key(principal.email))
+    cache.client.publish.assert_awaited_once_with(settings.PRINCIPAL_CACHE_CHANNEL, principal.email)
+
+
+def test_principal_load_that_raced_an_invalidation_is_not_cached():
+    principal = _principal()
+    cache = PrincipalCache(MagicMock(get_value=AsyncMock(return_value=None), set_value_if=AsyncMock(return_value=True),
+                                     bump_and_delete=AsyncMock(), publish=AsyncMock()))
+
+    generation = asyncio.run(cache.generation(principal.email))  # the row is read after this...
+    asyncio.run(cache.invalidate(principal.email))  # ...but the user changed before it was cached
+    asyncio.run(cache.set(principal, generation))
+
+    assert principal.email not in cache._local
+    cache.client.set_value_if.assert_not_awaited()
+
+
+def test_principal_cache_skips_loads_another_worker_invalidated():
+    principal = _principal()
+    cache = PrincipalCache(MagicMock(get_value=AsyncMock(return_value="3"), set_value_if=AsyncMock(return_value=False)))
+
+    generation = asyncio.run(cache.generation(principal.email))
+    asyncio.run(cache.set(principal, generation))  # Redis generation moved past "3" in the meantime
+
+    assert generation == PrincipalGeneration(0, "3")
+    cache.client.set_value_if.assert_awaited_once_with(
+        PrincipalCache.key(principal.email), principal.model_dump_json(), settings.PRINCIPAL_CACHE_TTL,
+        PrincipalCache.generation_key(principal.email), "3")
+    assert principal.email not in cache._local
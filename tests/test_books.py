@@ -0,0 +1,683 @@
+import asyncio
+import csv
+import datetime
+import io
+import json
+import uuid
+from types import SimpleNamespace
+from unittest.mock import ANY, AsyncMock, MagicMock
+
+import httpx
+import pytest
+from sqlalchemy import inspect, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, lazyload, raiseload
+
+from src.books.cache import BookCache, CachedBook
+from src.books.dependencies import get_book_service
+from src.books.models import BookModel
+from src.books.schemas import BookCreate, BookFilter, BookRatingStats, BookResponse, BookSort, BookUpdate, BookValidator, \
+    BookView, TagMatch
+from src.books.service import BookService, validate_book_batch, book_etag, book_validator_columns, \
+    to_book_validator
+from src.core.config import settings
+from src.db.session import UnplannedLoad, explicit_refresh, run_after_commit
+from src.main import app
+from src.shared.exception_handlers import BookNotFound, InvalidCursor, PreconditionFailed
+from src.shared.utils import encode_cursor, decode_cursor, if_match_versions, make_etag
+
+books_prefix = "/api/v1/books"
+
+
+def make_book(**overrides):
+    book = {
+        "bid": uuid.uuid4(),
+        "title": "Think Python",
+        "author": "Allen B. Downey",
+        "publisher": "O'Reilly Media",
+        "published_date": "2021-01-01",
+        "page_count": 1234,
+        "language": "English",
+        "rating": 4,
+        "review_count": 0,
+        "avg_rating": None,
+        "version": 1,
+        "created_at": datetime.datetime.now(datetime.timezone.utc),
+        "updated_at": datetime.datetime.now(datetime.timezone.utc),
+        "reviews": [],
+        "tags": [],
+    }
+    book.update(overrides)
+    return SimpleNamespace(**book)
+
+
+def as_validator(book):
+    return BookValidator.from_book(book)
+
+
+# Test cursor round trip
+def test_cursor_round_trip():
+    created_at = datetime.datetime.now(datetime.timezone.utc)
+    bid = uuid.uuid4()
+
+    cursor = encode_cursor(created_at, bid)
+
+    assert decode_cursor(cursor, datetime.datetime.fromisoformat, uuid.UUID) == [created_at, bid]
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor", datetime.datetime.fromisoformat, uuid.UUID)
+
+
+# Test GET /books/ pagination
+def test_get_all_books_returns_page(client, mock_book_service):
+    book = make_book()
+    mock_book_service.list_books.return_value = ([as_validator(book)], "next-page")
+    mock_book_service.get_books_by_ids.return_value = [book]
+
+    response = client.get(f"{books_prefix}/", params={"limit": 1})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["next_cursor"] == "next-page"
+    assert [item["bid"] for item in data["items"]] == [str(book.bid)]
+    mock_book_service.list_books.assert_awaited_with(
+        limit=1, cursor=None, summary=False, filters=BookFilter(), sort=BookSort.newest,
+        tag_ids=None, tag_match=TagMatch.all)
+    mock_book_service.get_books_by_ids.assert_awaited_with([book.bid], summary=False)
+
+
+def test_get_all_books_returns_empty_page_when_nothing_matches(client, mock_book_service, monkeypatch):
+    monkeypatch.setattr(mock_book_service.list_books, "return_value", ([], None))  # shared mock, restored after
+
+    response = client.get(f"{books_prefix}/", params={"author": "Nobody", "cursor": "past-the-end"})
+
+    assert response.status_code == 200
+    assert response.json() == {"items": [], "next_cursor": None}
+
+
+def test_get_all_books_rejects_oversized_limit(client):
+    response = client.get(f"{books_prefix}/", params={"limit": 10_000})
+
+    assert response.status_code == 422
+
+
+def test_get_all_books_summary_view_omits_relationships(client, mock_book_service):
+    book = make_book()
+    mock_book_service.list_books.return_value = ([BookValidator.from_book(book, BookView.summary)], None)
+    mock_book_service.get_books_by_ids.return_value = [book]
+
+    response = client.get(f"{books_prefix}/", params={"view": "summary"})
+
+    assert response.status_code == 200
+    item = response.json()["items"][0]
+    assert "reviews" not in item and "tags" not in item
+    mock_book_service.list_books.assert_awaited_with(
+        limit=20, cursor=None, summary=True, filters=BookFilter(), sort=BookSort.newest,
+        tag_ids=None, tag_match=TagMatch.all)
+
+
+def test_summary_books_load_every_validator_column(run_in_database):
+    async def scenario(session):
+        book_data = BookCreate(title="Think Python", author="Allen B. Downey", publisher="O'Reilly Media",
+                               published_date="2021-01-01", page_count=1234, language="English", rating=4)
+        created = await BookService(session).create_book(book_data, user_uid=None)
+        session.expunge_all()  # load the summary projection from the database, not the identity map
+
+        [book] = await BookService(session).get_books_by_ids([created.bid], summary=True)
+
+        assert "version" not in inspect(book).unloaded
+        return BookValidator.from_book(book, BookView.summary)  # no lazy load outside the greenlet
+
+    validator = run_in_database(scenario)
+    assert validator.version == 1
+
+
+def test_get_all_books_passes_filters_and_sort(client, mock_book_service):
+    book = make_book()
+    mock_book_service.list_books.return_value = ([as_validator(book)], None)
+    mock_book_service.get_books_by_ids.return_value = [book]
+
+    response = client.get(f"{books_prefix}/", params={
+        "author": "Allen B. Downey", "published_from": "2020-01-01", "min_rating": 4, "sort": "-published_date",
+    })
+
+    assert response.status_code == 200
+    mock_book_service.list_books.assert_awaited_with(
+        limit=20, cursor=None, summary=False, sort=BookSort.published_desc,
+        filters=BookFilter(author="Allen B. Downey", published_from=datetime.date(2020, 1, 1), min_rating=4),
+        tag_ids=None, tag_match=TagMatch.all)
+
+
+def test_get_all_books_by_tags_resolves_names(client, mock_book_service, mock_tag_service):
+    book = make_book()
+    fiction, classic = uuid.uuid4(), uuid.uuid4()
+    mock_book_service.list_books.return_value = ([as_validator(book)], None)
+    mock_book_service.get_books_by_ids.return_value = [book]
+    mock_tag_service.require_tag_ids.return_value = {"fiction": fiction, "classic": classic}
+
+    response = client.get(f"{books_prefix}/", params={"tags": "fiction, classic,", "match": "any"})
+
+    assert response.status_code == 200
+    mock_tag_service.require_tag_ids.assert_awaited_with(["fiction", "classic"])
+    assert mock_book_service.list_books.await_args.kwargs["tag_ids"] == [fiction, classic]
+    assert mock_book_service.list_books.await_args.kwargs["tag_match"] == TagMatch.any
+
+
+def test_list_books_by_all_tags_intersects_book_tags():
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=[])))
+    service = BookService(db)
+
+    asyncio.run(service.list_books(limit=10, tag_ids=[uuid.uuid4(), uuid.uuid4()], tag_match=TagMatch.all))
+
+    sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "books.bid IN (SELECT book_tags.book_id" in sql
+    assert "INTERSECT SELECT book_tags.book_id" in sql
+
+
+def test_get_all_books_rejects_out_of_range_rating_filter(client):
+    response = client.get(f"{books_prefix}/", params={"min_rating": 9})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("params", [
+    {"published_from": "2021-01-01", "published_to": "2020-01-01"},
+    {"min_rating": 4, "max_rating": 2},
+])
+def test_get_all_books_rejects_inverted_filter_ranges(client, mock_book_service, params):
+    mock_book_service.list_books.reset_mock()
+
+    response = client.get(f"{books_prefix}/", params=params)
+
+    assert response.status_code == 422
+    mock_book_service.list_books.assert_not_awaited()
+
+
+def test_published_date_normalizes_swapped_day_and_month(sample_books):
+    book = BookCreate.model_validate({**sample_books[0], "published_date": "2011-21-01"})
+
+    assert book.published_date == datetime.date(2011, 1, 21)
+    with pytest.raises(ValueError):
+        BookCreate.model_validate({**sample_books[0], "published_date": "2011-31-31"})
+
+
+# Test GET /books/user/{user_id}
+def test_get_books_by_user_without_books_returns_empty_page(client, mock_book_service, monkeypatch):
+    monkeypatch.setattr(mock_book_service.get_books_by_user, "return_value", ([], None))
+
+    response = client.get(f"{books_prefix}/user/{uuid.uuid4()}")
+
+    assert response.status_code == 200
+    assert response.json() == {"items": [], "next_cursor": None}
+
+
+def test_get_books_by_user_is_paginated(client, mock_book_service):
+    book, user_id = make_book(), uuid.uuid4()
+    mock_book_service.get_books_by_user.return_value = ([as_validator(book)], "next-page")
+    mock_book_service.get_books_by_ids.return_value = [book]
+
+    response = client.get(f"{books_prefix}/user/{user_id}", params={"limit": 1})
+
+    assert response.status_code == 200
+    assert response.json()["next_cursor"] == "next-page"
+    mock_book_service.get_books_by_user.assert_awaited_with(user_id, limit=1, cursor=None, summary=False)
+
+
+def test_count_books_by_user(client, mock_book_service):
+    user_id = uuid.uuid4()
+    mock_book_service.count_books_by_user.return_value = 42
+
+    response = client.get(f"{books_prefix}/user/{user_id}/count")
+
+    assert response.status_code == 200
+    assert response.json() == {"user_id": str(user_id), "count": 42}
+
+
+# Test GET /books/{book_id}/stats
+def test_get_book_rating_stats(client, mock_book_service):
+    book_id = uuid.uuid4()
+    mock_book_service.get_rating_stats.return_value = BookRatingStats(
+        book_uid=book_id, review_count=3, avg_rating=4.0, histogram={1: 0, 2: 0, 3: 1, 4: 1, 5: 1})
+
+    response = client.get(f"{books_prefix}/{book_id}/stats")
+
+    assert response.status_code == 200
+    assert response.json()["histogram"] == {"1": 0, "2": 0, "3": 1, "4": 1, "5": 1}
+    mock_book_service.get_rating_stats.assert_awaited_with(book_id)
+
+
+def test_get_book_rating_stats_not_found(client, mock_book_service):
+    mock_book_service.get_rating_stats.return_value = None
+
+    response = client.get(f"{books_prefix}/{uuid.uuid4()}/stats")
+
+    assert response.status_code == 404
+
+
+# Test POST /books/batch-get
+def test_batch_get_books_keeps_order_with_nulls(client, mock_book_service):
+    first, second = make_book(title="First book"), make_book(title="Second book")
+    missing = uuid.uuid4()
+    mock_book_service.get_books_by_ids.return_value = [second, first]
+    ids = [str(first.bid), str(missing), str(second.bid)]
+
+    response = client.post(f"{books_prefix}/batch-get", json={"ids": ids})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [item and item["title"] for item in data] == ["First book", None, "Second book"]
+    mock_book_service.get_books_by_ids.assert_awaited_with([first.bid, missing, second.bid], summary=False)
+
+
+def test_batch_get_books_rejects_empty_ids(client):
+    response = client.post(f"{books_prefix}/batch-get", json={"ids": []})
+
+    assert response.status_code == 422
+
+
+# Test GET /books/export streaming
+def _stream(*books):
+    async def _books(batch_size):
+        for book in books:
+            yield book
+    return _books
+
+
+def test_export_books_ndjson(client, mock_book_service):
+    books = [make_book(title=f"Book {i}") for i in range(3)]
+    mock_book_service.stream_books = _stream(*books)
+
+    response = client.get(f"{books_prefix}/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert [json.loads(line)["title"] for line in lines] == ["Book 0", "Book 1", "Book 2"]
+
+
+def test_export_books_csv(client, mock_book_service):
+    mock_book_service.stream_books = _stream(make_book())
+
+    response = client.get(f"{books_prefix}/export", params={"format": "csv"})
+
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 1 and rows[0]["title"] == "Think Python"
+
+
+# Test POST /books/bulk
+def test_validate_book_batch_reports_errors_by_index(sample_books):
+    items = sample_books + [{"title": "x", "rating": 9}]
+
+    rows, indexes, errors = validate_book_batch(items, offset=100)
+
+    assert indexes == list(range(100, 100 + len(sample_books)))
+    assert all("id" not in row for row in rows)
+    assert [error.index for error in errors] == [100 + len(sample_books)]
+    assert {err["loc"][0] for err in errors[0].errors} >= {"title", "rating", "author"}
+
+
+def test_bulk_insert_failure_reports_only_the_rows_that_fail(sample_books):
+    bad_title = sample_books[1]["title"]
+
+    async def execute(statement, rows):
+        if len(rows) > 1 or rows[0]["title"] == bad_title:
+            raise IntegrityError("INSERT INTO books", {}, Exception("value too long"))
+        return MagicMock(scalars=MagicMock(return_value=MagicMock(all=MagicMock(return_value=[uuid.uuid4()]))))
+
+    async def items():
+        for book in sample_books:
+            yield book
+
+    db = MagicMock(begin_nested=MagicMock(return_value=AsyncMock()))
+    db.execute = AsyncMock(side_effect=execute)
+
+    result = asyncio.run(BookService(db).bulk_create_books(items(), uuid.uuid4(), batch_size=len(sample_books)))
+
+    assert result.created == len(sample_books) - 1
+    assert [error.index for error in result.errors] == [1]
+    assert "value too long" in result.errors[0].errors[0]["msg"]
+
+
+def test_bulk_create_books_from_ndjson(client, mock_book_service, sample_books, token_payload, monkeypatch):
+    received = []
+
+    async def bulk_create_books(items, user_uid, batch_size):
+        received.extend([item async for item in items])
+        return {"created": len(received), "bids": [], "errors": []}
+
+    monkeypatch.setattr(mock_book_service, "bulk_create_books", bulk_create_books)
+    body = "\n".join(json.dumps(book) for book in sample_books) + "\n"
+
+    response = client.post(f"{books_prefix}/bulk", content=body,
+                           headers={"Content-Type": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    assert response.json()["created"] == len(sample_books)
+    assert [json.loads(line)["title"] for line in received] == [book["title"] for book in sample_books]
+
+
+def test_bulk_create_books_rejects_non_array(client, token_payload):
+    response = client.post(f"{books_prefix}/bulk", json={"title": "not a list"})
+
+    assert response.status_code == 422
+
+
+# Test GET /books/search
+def test_search_books(client, mock_book_service):
+    book = make_book(title="Think Python")
+    mock_book_service.search_books.return_value = ([BookValidator.from_book(book, BookView.summary)], None)
+    mock_book_service.get_books_by_ids.return_value = [book]
+
+    response = client.get(f"{books_prefix}/search", params={"q": "python", "view": "summary"})
+
+    assert response.status_code == 200
+    assert response.json() == {"items": [ANY], "next_cursor": None}
+    mock_book_service.search_books.assert_awaited_with("python", limit=20, cursor=None, summary=True)
+
+
+# Test GET /books/top-rated
+def test_get_top_rated_books(client, mock_book_service):
+    book = make_book(review_count=3, avg_rating=4.5)
+    mock_book_service.top_rated_books.return_value = ([as_validator(book)], None)
+    mock_book_service.get_books_by_ids.return_value = [book]
+
+    response = client.get(f"{books_prefix}/top-rated", params={"min_reviews": 3, "view": "summary"})
+
+    assert response.status_code == 200
+    item = response.json()["items"][0]
+    assert (item["review_count"], item["avg_rating"]) == (3, 4.5)
+    mock_book_service.top_rated_books.assert_awaited_with(limit=20, cursor=None, min_reviews=3, summary=True)
+
+
+def test_search_books_requires_query(client):
+    response = client.get(f"{books_prefix}/search")
+
+    assert response.status_code == 422
+
+
+# Test GET /books/{book_id} cached read
+def cached_book(book):
+    etag, last_modified = book_etag([as_validator(book)], BookView.full, version=book.version)
+    return CachedBook(etag, last_modified, BookResponse.model_validate(book).model_dump_json())
+
+
+def test_get_a_book_returns_cached_payload(client, mock_book_service):
+    book = make_book()
+    entry = cached_book(book)
+    mock_book_service.get_cached_book.return_value = entry
+
+    response = client.get(f"{books_prefix}/{book.bid}")
+
+    assert response.status_code == 200
+    assert response.json()["bid"] == str(book.bid)
+    assert response.headers["etag"] == entry.etag
+    assert "last-modified" in response.headers
+
+
+def test_get_a_book_not_found(client, mock_book_service):
+    mock_book_service.get_cached_book.return_value = None
+    mock_book_service.get_book_validator.return_value = None
+
+    response = client.get(f"{books_prefix}/{uuid.uuid4()}")
+
+    assert response.status_code == 404
+
+
+class FakeRedis:
+    """ The RedisClient calls the book cache makes, over a dict """
+
+    def __init__(self):
+        self.store = {}
+
+    async def get_value(self, key):
+        return self.store.get(key)
+
+    async def set_value_if(self, key, value, ttl, guard_key, guard_value):
+        if self.store.get(guard_key, "") != guard_value:
+            return False
+        self.store[key] = value
+        return True
+
+    async def bump_and_delete(self, counter_keys, ttl, *keys):
+        for counter_key in counter_keys:
+            self.store[counter_key] = str(int(self.store.get(counter_key, "0")) + 1)
+        for key in keys:
+            self.store.pop(key, None)
+
+
+def test_book_cache_counts_hits_and_misses():
+    redis = FakeRedis()
+    cache = BookCache(redis)
+    bid = uuid.uuid4()
+
+    entry = CachedBook('"etag"', datetime.datetime.now(datetime.timezone.utc), "{}")
+
+    async def scenario():
+        assert await cache.get(bid) is None
+        await cache.set(bid, entry, await cache.generation(bid))
+        assert await cache.get(bid) == entry
+
+    asyncio.run(scenario())
+
+    assert cache.stats() == {"hits": 1, "misses": 1, "errors": 0, "hit_ratio": 0.5}
+    assert list(redis.store) == [BookCache.key(bid)]
+
+
+def test_book_load_that_raced_an_invalidation_is_not_cached(monkeypatch):
+    cache = BookCache(FakeRedis())
+    monkeypatch.setattr("src.books.service.book_cache", cache)
+    book = make_book()
+    writes = [True, False]  # a write commits during the first load only
+
+    async def get_book(book_id):
+        if writes.pop(0):
+            await cache.invalidate(book_id)  # the writer's after-commit invalidation, after the reader's SELECT
+        return book
+
+    service = BookService(MagicMock())
+    service.get_book = get_book
+
+    async def scenario():
+        assert await service.load_book(book.bid) is not None  # served to this reader...
+        assert await cache.get(book.bid) is None  # ...but not cached for the next ones
+        entry = await service.load_book(book.bid)
+        assert await cache.get(book.bid) == entry  # an undisturbed load fills the cache
+
+    asyncio.run(scenario())
+
+
+# Test conditional GET
+def test_get_a_book_not_modified_on_cache_miss_skips_loading(client, mock_book_service):
+    book = make_book()
+    mock_book_service.get_cached_book.return_value = None
+    mock_book_service.get_book_validator.return_value = as_validator(book)
+    mock_book_service.load_book.reset_mock()
+    etag, _ = book_etag([as_validator(book)], BookView.full, version=book.version)
+
+    response = client.get(f"{books_prefix}/{book.bid}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    mock_book_service.load_book.assert_not_awaited()
+
+
+@pytest.mark.parametrize("view", list(BookView))
+def test_book_etag_changes_with_version_alone(view):
+    book = make_book()
+    edited = make_book(bid=book.bid, updated_at=book.updated_at, version=book.version + 1)
+
+    assert book_etag([BookValidator.from_book(book, view)], view) != \
+           book_etag([BookValidator.from_book(edited, view)], view)
+
+
+def test_tag_rename_changes_book_etag():
+    tag = SimpleNamespace(uid=uuid.uuid4(), name="Fiction", created_at=datetime.datetime.now(datetime.timezone.utc))
+    book = make_book(tags=[tag])
+    before, _ = book_etag([as_validator(book)], BookView.full, version=book.version)
+
+    tag.name = "Literary Fiction"
+    renamed = as_validator(book)
+    after, _ = book_etag([renamed], BookView.full, version=book.version)
+
+    assert before != after
+    # The query-built validator carries the names too, in tag_id order like from_book
+    row = SimpleNamespace(bid=book.bid, updated_at=book.updated_at, version=book.version, review_count=0,
+                          reviews_updated_at=None, tag_ids=[tag.uid], tag_names=["Literary Fiction"])
+    assert to_book_validator(row) == renamed
+    sql = str(select(*book_validator_columns()).compile(dialect=postgresql.dialect()))
+    assert "array_agg(tags.name ORDER BY book_tags.tag_id)" in sql
+
+
+def test_get_a_book_not_modified_since(client, mock_book_service):
+    book = make_book(updated_at=datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc))
+    mock_book_service.get_cached_book.return_value = cached_book(book)
+
+    response = client.get(f"{books_prefix}/{book.bid}",
+                          headers={"If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT"})
+
+    assert response.status_code == 304
+
+
+def test_get_all_books_not_modified_skips_loading(client, mock_book_service):
+    book = make_book()
+    mock_book_service.list_books.return_value = ([as_validator(book)], None)
+    mock_book_service.get_books_by_ids.reset_mock()
+    etag, _ = book_etag([as_validator(book)], BookView.full)
+
+    response = client.get(f"{books_prefix}/", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    mock_book_service.get_books_by_ids.assert_not_awaited()
+
+
+# Test the RETURNING write path
+def test_delete_book_is_one_statement_and_maps_missing_to_not_found():
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=MagicMock(scalar_one_or_none=MagicMock(return_value=None)))
+    service = BookService(db)
+
+    with pytest.raises(BookNotFound):
+        asyncio.run(service.delete_book(uuid.uuid4()))
+
+    db.execute.assert_awaited_once()
+    assert "RETURNING" in str(db.execute.await_args.args[0])
+
+
+def test_update_book_invalidates_cache_only_once_committed(monkeypatch):
+    invalidate = AsyncMock()
+    monkeypatch.setattr("src.books.service.book_cache.invalidate", invalidate)
+    book = make_book()
+    sync_session = Session()  # stands in for the session behind the mock: holds info, fires transaction events
+    db = MagicMock(info=sync_session.info)
+    db.scalars = AsyncMock(return_value=MagicMock(one_or_none=MagicMock(return_value=book)))
+    service = BookService(db)
+
+    sync_session.begin()
+    asyncio.run(service.update_book(book.bid, BookUpdate(title="Renamed")))
+    sync_session.rollback()
+    asyncio.run(run_after_commit(db))
+    invalidate.assert_not_awaited()
+
+    asyncio.run(service.update_book(book.bid, BookUpdate(title="Renamed")))
+    invalidate.assert_not_awaited()  # a read now would still find the old row committed
+    sync_session.commit()
+    asyncio.run(run_after_commit(db))
+    invalidate.assert_awaited_once_with(book.bid)
+
+
+# Test If-Match optimistic concurrency
+def test_if_match_versions():
+    assert if_match_versions({}) is None
+    assert if_match_versions({"if-match": "*"}) is None
+    assert if_match_versions({"if-match": f'{make_etag("x", version=3)}, W/"4-abc", "5-def"'}) == [3, 5]
+    assert if_match_versions({"if-match": make_etag("x")}) == []
+
+
+def test_update_a_book_forwards_if_match(client, mock_book_service):
+    book = make_book(version=2)
+    mock_book_service.update_book.return_value = book
+
+    mock_book_service.get_book_validator.return_value = as_validator(book)
+
+    response = client.patch(f"{books_prefix}/{book.bid}", json={"title": "Renamed"},
+                            headers={"If-Match": make_etag("full", version=2)})
+
+    assert response.status_code == 200
+    mock_book_service.update_book.assert_awaited_with(book.bid, ANY, expected_versions=[2])
+    assert response.headers["etag"] == book_etag([as_validator(book)], BookView.full, version=2)[0]
+
+
+def test_update_book_stale_version_is_precondition_failed():
+    db = MagicMock()
+    db.scalars = AsyncMock(return_value=MagicMock(one_or_none=MagicMock(return_value=None)))
+    db.scalar = AsyncMock(return_value=3)  # the book exists, at another version
+    service = BookService(db)
+
+    with pytest.raises(PreconditionFailed):
+        asyncio.run(service.update_book(uuid.uuid4(), BookUpdate(title="Renamed"), expected_versions=[2]))
+
+    assert "books.version IN" in str(db.scalars.await_args.args[0])
+
+
+# Test the relationship loading policy
+def test_get_book_states_its_relationship_loads():
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=MagicMock(scalar_one_or_none=MagicMock(return_value=None)))
+
+    asyncio.run(BookService(db).get_book(uuid.uuid4()))
+
+    options = db.execute.await_args.args[0]._with_options
+    loads = {(opt.path[1].key, opt.context[0].strategy) for opt in options}
+    assert loads == {("reviews", (("lazy", "selectin"),)), ("tags", (("lazy", "selectin"),)), ("user", (("lazy", "raise"),))}
+
+
+def test_strict_loading_allows_planned_statements_and_refuses_unplanned_loads(monkeypatch, run_in_database):
+    monkeypatch.setattr(settings, "STRICT_LOADING", True)
+
+    async def scenario(session):
+        service = BookService(session)
+        book_data = BookCreate(title="Think Python", author="Allen B. Downey", publisher="O'Reilly Media",
+                               published_date="2021-01-01", page_count=1234, language="English", rating=4)
+        book = await service.create_book(book_data, user_uid=None)  # INSERT ... RETURNING
+        await service.update_book(book.bid, BookUpdate(title="Think Python 2e"))  # UPDATE ... RETURNING
+        session.expunge_all()
+        [loaded] = await service.get_books_by_ids([book.bid])  # SELECT with its loader options
+        assert loaded.title == "Think Python 2e"
+        await explicit_refresh(session, loaded, ["search_vector"])  # asked for, not triggered by access
+
+        lazy = (await session.scalars(select(BookModel).where(BookModel.bid == book.bid)
+                                      .options(lazyload(BookModel.reviews)))).one()
+        with pytest.raises(UnplannedLoad):
+            await session.run_sync(lambda _: lazy.reviews)
+        session.expire(lazy, ["title"])
+        with pytest.raises(UnplannedLoad):
+            await session.run_sync(lambda _: lazy.title)
+
+        assert await service.delete_book(book.bid)  # DELETE ... RETURNING
+
+    run_in_database(scenario)
+
+
+def test_strict_loading_fails_a_route_that_lazy_loads(monkeypatch, run_in_database):
+    monkeypatch.setattr(settings, "STRICT_LOADING", True)
+    # GET /books/{id} without its selectinload() plan: serializing the reviews would lazy load them
+    monkeypatch.setattr("src.books.service.book_detail_options",
+                        lambda: (lazyload(BookModel.reviews), lazyload(BookModel.tags), raiseload(BookModel.user)))
+
+    async def scenario(session):
+        book_data = BookCreate(title="Think Python", author="Allen B. Downey", publisher="O'Reilly Media",
+                               published_date="2021-01-01", page_count=1234, language="English", rating=4)
+        book = await BookService(session).create_book(book_data, user_uid=None)
+        session.expunge_all()
+        monkeypatch.setitem(app.dependency_overrides, get_book_service, lambda: BookService(session))
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            with pytest.raises(UnplannedLoad):
+                await client.get(f"{books_prefix}/{book.bid}")
+
+    run_in_database(scenario)
@@ -0,0 +1,308 @@
+import asyncio
+import datetime
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DataError, OperationalError
+from sqlalchemy.orm import Session
+
+from src.auth.dependencies import get_current_user
+from src.core.config import settings
+from src.db.session import run_after_commit
+from src.main import app
+from src.reviews import buffer
+from src.reviews.buffer import ReviewBuffer, review_row
+from src.reviews.schemas import ReviewAccepted, ReviewCreate, ReviewUpdate
+from src.reviews.service import ReviewService
+from src.shared.exception_handlers import BookNotFound, InsufficientPermission
+
+reviews_prefix = "/api/v1/reviews"
+
+
+def make_review(**overrides):
+    review = {
+        "uid": uuid.uuid4(),
+        "book_uid": uuid.uuid4(),
+        "user_uid": uuid.uuid4(),
+        "review_text": "Great read",
+        "rating": 5,
+        "created_at": datetime.datetime.now(datetime.timezone.utc),
+        "updated_at": datetime.datetime.now(datetime.timezone.utc),
+    }
+    review.update(overrides)
+    return SimpleNamespace(**review)
+
+
+# Test GET /reviews/book/{book_uid} pagination
+def test_get_book_reviews_returns_page(client, mock_review_service):
+    review = make_review()
+    mock_review_service.list_book_reviews.return_value = ([review], "next-page")
+
+    response = client.get(f"{reviews_prefix}/book/{review.book_uid}", params={"limit": 1})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["next_cursor"] == "next-page"
+    assert [item["uid"] for item in data["items"]] == [str(review.uid)]
+    mock_review_service.list_book_reviews.assert_awaited_with(review.book_uid, limit=1, cursor=None)
+
+
+# Test GET /reviews/user/{user_uid} pagination
+def test_get_user_reviews_passes_cursor(client, mock_review_service):
+    review = make_review()
+    mock_review_service.list_user_reviews.return_value = ([review], None)
+
+    response = client.get(f"{reviews_prefix}/user/{review.user_uid}", params={"cursor": "abc"})
+
+    assert response.status_code == 200
+    assert response.json()["next_cursor"] is None
+    mock_review_service.list_user_reviews.assert_awaited_with(review.user_uid, limit=20, cursor="abc")
+
+
+# Test POST /reviews/book/{book_uid}
+def test_add_review_uses_principal_uid(client, mock_review_service, mock_current_user):
+    review = make_review(user_uid=mock_current_user.uid)
+    mock_review_service.add_review_to_book.return_value = review
+
+    response = client.post(f"{reviews_prefix}/book/{review.book_uid}", json={"review_text": "Great read", "rating": 5})
+
+    assert response.status_code == 201
+    mock_review_service.add_review_to_book.assert_awaited_once()
+    assert mock_review_service.add_review_to_book.await_args.args[1:] == (review.book_uid, mock_current_user.uid)
+    mock_review_service.add_review_to_book.reset_mock()
+
+
+def test_add_review_by_inactive_user_is_refused(client, mock_review_service, monkeypatch):
+    async def inactive_user():
+        raise HTTPException(status_code=403, detail="User not found or inactive")
+
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, inactive_user)
+    monkeypatch.setattr(settings, "REVIEW_BUFFER_ENABLED", True)  # not even queued
+    monkeypatch.setattr(buffer.review_buffer, "submit", AsyncMock())
+
+    response = client.post(f"{reviews_prefix}/book/{uuid.uuid4()}", json={"review_text": "Great read", "rating": 5})
+
+    assert response.status_code == 403
+    buffer.review_buffer.submit.assert_not_awaited()
+
+
+def test_add_review_to_missing_book_skips_insert():
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=MagicMock(scalar_one_or_none=MagicMock(return_value=None)))
+    db.scalars = AsyncMock()
+    service = ReviewService(db, user_service=MagicMock(), book_service=MagicMock())
+
+    with pytest.raises(BookNotFound):
+        asyncio.run(service.add_review_to_book(ReviewCreate(review_text="Great read", rating=5), uuid.uuid4(), uuid.uuid4()))
+
+    db.scalars.assert_not_awaited()
+
+
+def test_add_review_again_replaces_previous_rating(monkeypatch):
+    review = make_review(rating=5)
+    db = MagicMock()
+    db.execute = AsyncMock(side_effect=[MagicMock(scalar_one_or_none=MagicMock(return_value=review.book_uid)),
+                                        MagicMock(one=MagicMock(return_value=(review, 2)))])
+    service = ReviewService(db, user_service=MagicMock(), book_service=MagicMock())
+    service._apply_rating_change = AsyncMock(return_value=True)
+    monkeypatch.setattr("src.reviews.service.book_cache.invalidate", AsyncMock())
+
+    result = asyncio.run(service.add_review_to_book(ReviewCreate(review_text="Great read", rating=5),
+                                                    review.book_uid, review.user_uid))
+
+    assert result is review
+    upsert_sql = str(db.execute.await_args_list[1].args[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (book_uid, user_uid) DO UPDATE" in upsert_sql
+    service._apply_rating_change.assert_awaited_once_with(review.book_uid, {2: -1, 5: 1})
+
+
+# Test review update/delete keeping the rollups in step
+def _review_service_with_locked_review(review):
+    db = MagicMock()
+    db.scalar = AsyncMock(return_value=review.book_uid)
+    db.execute = AsyncMock(return_value=MagicMock(one_or_none=MagicMock(return_value=review)))
+    return ReviewService(db, user_service=MagicMock(), book_service=MagicMock()), db
+
+
+def test_edit_and_delete_review_act_as_current_user(client, mock_review_service, mock_current_user):
+    review = make_review(user_uid=mock_current_user.uid)
+    mock_review_service.update_review.return_value = review
+
+    assert client.patch(f"{reviews_prefix}/{review.uid}", json={"rating": 4}).status_code == 200
+    assert client.delete(f"{reviews_prefix}/{review.uid}").status_code == 200
+
+    assert mock_review_service.update_review.await_args.args[2] == mock_current_user.uid
+    mock_review_service.delete_review.assert_awaited_with(review.uid, mock_current_user.uid)
+
+
+def test_update_review_moves_rating_between_stars(monkeypatch):
+    review = make_review(rating=5)
+    service, db = _review_service_with_locked_review(make_review(book_uid=review.book_uid, user_uid=review.user_uid, rating=3))
+    db.scalars = AsyncMock(return_value=MagicMock(one=MagicMock(return_value=review)))
+    service._apply_rating_change = AsyncMock(return_value=True)
+    monkeypatch.setattr("src.reviews.service.book_cache.invalidate", AsyncMock())
+
+    asyncio.run(service.update_review(review.uid, ReviewUpdate(rating=5), review.user_uid))
+
+    service._apply_rating_change.assert_awaited_once_with(review.book_uid, {3: -1, 5: 1})
+
+
+def test_rating_change_leaves_book_version_alone():
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=MagicMock(scalar_one_or_none=MagicMock(return_value=uuid.uuid4())))
+    service = ReviewService(db, user_service=MagicMock(), book_service=MagicMock())
+
+    asyncio.run(service._apply_rating_change(uuid.uuid4(), {4: 1}))
+
+    aggregate_sql = str(db.execute.await_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+    assert "review_count=" in aggregate_sql and "version" not in aggregate_sql  # no 412 for editors
+
+
+def test_review_edits_lock_the_book_before_the_review():
+    review = make_review()
+    service, db = _review_service_with_locked_review(review)
+    service._apply_rating_change = AsyncMock(return_value=True)
+
+    asyncio.run(service.delete_review(review.uid, review.user_uid))
+
+    book_lock, review_lock = (str(call.args[0].compile(dialect=postgresql.dialect()))
+                              for call in db.execute.await_args_list[:2])
+    assert book_lock.startswith("SELECT books.bid") and book_lock.endswith("FOR UPDATE")
+    assert "FROM reviews" in review_lock and review_lock.endswith("FOR UPDATE")
+
+
+def test_delete_review_of_another_user_is_refused():
+    service, db = _review_service_with_locked_review(make_review())
+    service._apply_rating_change = AsyncMock()
+
+    with pytest.raises(InsufficientPermission):
+        asyncio.run(service.delete_review(uuid.uuid4(), uuid.uuid4()))
+
+    service._apply_rating_change.assert_not_awaited()
+
+
+# Test write-behind review ingestion
+def test_add_review_is_queued_when_buffer_enabled(client, mock_review_service, token_payload, monkeypatch):
+    book_uid = uuid.uuid4()
+    accepted = ReviewAccepted(book_uid=book_uid, user_uid=uuid.uuid4())
+    monkeypatch.setattr(settings, "REVIEW_BUFFER_ENABLED", True)
+    monkeypatch.setattr(buffer.review_buffer, "submit", AsyncMock(return_value=accepted))
+    mock_review_service.add_review_to_book.reset_mock()
+
+    response = client.post(f"{reviews_prefix}/book/{book_uid}", json={"review_text": "Great read", "rating": 4})
+
+    assert response.status_code == 202
+    assert response.json() == {"book_uid": str(book_uid), "user_uid": str(accepted.user_uid), "status": "queued"}
+    mock_review_service.add_review_to_book.assert_not_awaited()
+
+
+def test_buffered_review_keeps_the_rating_the_direct_path_stores():
+    client = MagicMock(stream_length=AsyncMock(return_value=0), stream_add=AsyncMock())
+    session = MagicMock(scalar=AsyncMock(return_value=True))
+
+    asyncio.run(ReviewBuffer(client).submit(
+        session, ReviewCreate(review_text="Great read", rating=4.0), uuid.uuid4(), uuid.uuid4()))
+
+    assert review_row(client.stream_add.await_args.args[1])["rating"] == 4
+    with pytest.raises(ValidationError):  # not silently truncated to 4 on either path
+        ReviewCreate(review_text="Great read", rating=4.5)
+
+
+def test_buffered_review_of_missing_book_is_not_queued():
+    client = MagicMock(stream_length=AsyncMock(return_value=0), stream_add=AsyncMock())
+    session = MagicMock(scalar=AsyncMock(return_value=False))
+
+    with pytest.raises(BookNotFound):
+        asyncio.run(ReviewBuffer(client).submit(
+            session, ReviewCreate(review_text="Great read", rating=4), uuid.uuid4(), uuid.uuid4()))
+
+    client.stream_add.assert_not_awaited()
+
+
+def test_review_buffer_writer_retries_consumer_group_creation(monkeypatch):
+    client = MagicMock(stream_create_group=AsyncMock(side_effect=[ConnectionError("Redis is down"), None]))
+    review_buffer = ReviewBuffer(client)
+
+    async def next_batch(stream, group):
+        review_buffer.stop()
+        return [], []
+
+    review_buffer._next_batch = next_batch
+    monkeypatch.setattr(settings, "REVIEW_BUFFER_FLUSH_INTERVAL_MS", 0)
+
+    asyncio.run(review_buffer.run(MagicMock()))  # does not die on the first failure
+
+    assert client.stream_create_group.await_count == 2
+
+
+def test_review_buffer_flush_upserts_batch_and_applies_rating_deltas(monkeypatch):
+    book_uid, returning_user, new_user = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    created_at = datetime.datetime.now(datetime.timezone.utc)
+
+    def entry(user_uid, rating, seconds):
+        return (f"{seconds}-0", {"uid": str(uuid.uuid4()), "book_uid": str(book_uid), "user_uid": str(user_uid),
+                                 "review_text": "Great read", "rating": str(rating),
+                                 "created_at": (created_at + datetime.timedelta(seconds=seconds)).isoformat()})
+
+    # returning_user re-rates 3 -> 5 (their retry with 4 stars is superseded), new_user adds 4 stars
+    entries = [entry(returning_user, 4, 0), entry(returning_user, 5, 1), entry(new_user, 4, 2)]
+    sync_session = Session()  # holds session.info and fires the commit event
+    session = MagicMock(info=sync_session.info)
+    session.scalars = AsyncMock(side_effect=[MagicMock(all=MagicMock(return_value=[book_uid])),
+                                             MagicMock(all=MagicMock(return_value=[returning_user, new_user]))])
+    session.execute = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=[(book_uid, returning_user, 3)])))
+    monkeypatch.setattr(buffer.book_cache, "invalidate", AsyncMock())
+
+    written = asyncio.run(ReviewBuffer(MagicMock()).flush(session, entries))
+
+    assert written == 2
+    _, upsert_stmt, update_stmt, stats_stmt = (call.args[0] for call in session.execute.await_args_list)
+    assert "ON CONFLICT (book_uid, user_uid) DO UPDATE" in str(upsert_stmt.compile(dialect=postgresql.dialect()))
+    assert "FROM (VALUES" in str(update_stmt.compile(dialect=postgresql.dialect()))
+    stats_params = stats_stmt.compile().params
+    assert [stats_params[f"count_{stars}_m0"] for stars in range(1, 6)] == [0, 0, -1, 1, 1]
+    buffer.book_cache.invalidate.assert_not_awaited()  # not before the batch commits
+    sync_session.commit()
+    asyncio.run(run_after_commit(session))
+    buffer.book_cache.invalidate.assert_awaited_once_with(book_uid)
+
+
+
+def _stream_entry(entry_id):
+    return entry_id, {"uid": str(uuid.uuid4()), "book_uid": str(uuid.uuid4()), "user_uid": str(uuid.uuid4()),
+                      "review_text": "Great read", "rating": "4", "created_at": "2026-01-01T00:00:00+00:00"}
+
+
+def test_review_buffer_keeps_redelivered_entries_out_of_the_batch(monkeypatch):
+    stale, poison = _stream_entry("1-0"), _stream_entry("2-0")
+    client = MagicMock(stream_claim_idle=AsyncMock(return_value=[stale, poison]),
+                       stream_delivery_counts=AsyncMock(return_value={"1-0": 2, "2-0": 3}))
+    monkeypatch.setattr(settings, "REVIEW_BUFFER_FLUSH_INTERVAL_MS", 0)
+
+    batch, suspects = asyncio.run(ReviewBuffer(client)._next_batch("reviews:ingest", "review-writers"))
+
+    assert (batch, suspects) == ([stale], [poison])
+
+
+def test_review_buffer_dead_letters_entry_postgres_rejects_alone():
+    entry_id, fields = entry = _stream_entry("2-0")
+    client = MagicMock(stream_dead_letter=AsyncMock())
+    review_buffer = ReviewBuffer(client)
+    review_buffer._write = AsyncMock(side_effect=DataError("INSERT INTO reviews", {}, Exception("0x00")))
+
+    asyncio.run(review_buffer._write_or_dead_letter(MagicMock(), entry))
+
+    dead_stream, dead_id, dead_fields = client.stream_dead_letter.await_args.args[2:5]
+    assert (dead_stream, dead_id) == (settings.REVIEW_BUFFER_DEAD_LETTER_STREAM, entry_id)
+    assert dead_fields["review_text"] == fields["review_text"] and "0x00" in dead_fields["error"]
+
+    review_buffer._write.side_effect = OperationalError("INSERT INTO reviews", {}, Exception("connection refused"))
+    client.stream_dead_letter.reset_mock()
+    with pytest.raises(OperationalError):  # not the entry's fault: it stays pending
+        asyncio.run(review_buffer._write_or_dead_letter(MagicMock(), entry))
+    client.stream_dead_letter.assert_not_awaited()
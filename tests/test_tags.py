@@ -0,0 +1,240 @@
+import asyncio
+import json
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from src.shared.exception_handlers import BookNotFound, TagAlreadyExists, TagNotFound
+from src.books.schemas import BookFilter
+from src.db.session import run_after_commit
+from src.tags.cache import TagCache, TagFacetCache
+from src.tags.schemas import TagAdd, TagCreate, TagFacet
+from src.tags.services import TagService
+
+tags_prefix = "/api/v1/tags"
+
+
+@pytest.fixture
+def tag_cache(monkeypatch):
+    """ A warmed tag dictionary with two tags, swapped in for the process-wide one """
+    cache = TagCache(MagicMock(publish=AsyncMock()))
+    cache.tags = {"fiction": uuid.uuid4(), "classic": uuid.uuid4()}
+    cache.load(SimpleNamespace(name=name.title(), uid=uid) for name, uid in cache.tags.items())
+    monkeypatch.setattr("src.tags.services.tag_cache", cache)
+    monkeypatch.setattr("src.tags.services.book_cache.invalidate", AsyncMock())
+    monkeypatch.setattr("src.tags.services.tag_facet_cache.invalidate", AsyncMock())
+    return cache
+
+
+def _tag_service(tag_rows=(), book=None):
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=list(tag_rows))))
+    book_service = MagicMock(get_book=AsyncMock(return_value=book))
+    return TagService(db, book_service), db
+
+
+def _tag_add(*names):
+    return TagAdd(tags=[{"name": name} for name in names])
+
+
+# Test POST /tags/book/{book_uid}/tags
+def test_add_tags_to_book_resolves_names_from_cache_and_inserts_once(tag_cache):
+    book = SimpleNamespace(bid=uuid.uuid4())
+    service, db = _tag_service(book=book)
+
+    result = asyncio.run(service.add_tag_to_book(book.bid, _tag_add("fiction", "Classic", "fiction")))
+
+    assert result is book
+    assign = db.execute.await_args.args[0]  # the only statement: names came from the dictionary
+    assign_sql = str(assign.compile(dialect=postgresql.dialect()))
+    assert assign_sql.startswith("INSERT INTO book_tags (book_id, tag_id) SELECT")
+    assert assign_sql.endswith("ON CONFLICT DO NOTHING")
+    db.execute.assert_awaited_once()
+
+
+def test_add_tags_to_book_reports_every_unknown_name(tag_cache):
+    service, db = _tag_service()
+
+    with pytest.raises(TagNotFound) as exc_info:
+        asyncio.run(service.add_tag_to_book(uuid.uuid4(), _tag_add("fantasy", "fiction", "horror")))
+
+    assert exc_info.value.details == {"tag_names": ["fantasy", "horror"]}
+    fallback = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "lower(tags.name) IN" in fallback
+    db.execute.assert_awaited_once()
+
+
+def test_add_tags_resolves_tag_created_on_another_worker(tag_cache):
+    horror = uuid.uuid4()
+    service, _ = _tag_service(tag_rows=[("Horror", horror)], book=SimpleNamespace(bid=uuid.uuid4()))
+
+    assert asyncio.run(service.resolve_tag_ids(["horror", "fiction"])) == {
+        "horror": horror, "fiction": tag_cache.tags["fiction"]}
+
+
+def test_add_tags_to_missing_book_is_not_found(tag_cache):
+    service, _ = _tag_service()
+
+    with pytest.raises(BookNotFound):
+        asyncio.run(service.add_tag_to_book(uuid.uuid4(), _tag_add("fiction")))
+
+
+# Test tag writes against the case-insensitive unique index
+def test_create_existing_tag_is_refused_without_invalidating(tag_cache):
+    service, db = _tag_service()
+    db.scalars = AsyncMock(return_value=MagicMock(one_or_none=MagicMock(return_value=None)))
+
+    with pytest.raises(TagAlreadyExists):
+        asyncio.run(service.create_tag(TagCreate(name="FICTION")))
+
+    assert "ON CONFLICT DO NOTHING" in str(db.scalars.await_args.args[0].compile(dialect=postgresql.dialect()))
+    tag_cache.client.publish.assert_not_awaited()
+
+
+def test_create_tag_invalidates_every_worker_once_committed(tag_cache):
+    service, db = _tag_service()
+    sync_session = Session()  # holds session.info and fires the commit event
+    db.info = sync_session.info
+    db.scalars = AsyncMock(return_value=MagicMock(one_or_none=MagicMock(return_value=SimpleNamespace(name="Horror"))))
+
+    asyncio.run(service.create_tag(TagCreate(name="Horror")))
+
+    # Not yet: other workers reloading now would not see the new tag
+    assert not tag_cache.is_stale()
+    tag_cache.client.publish.assert_not_awaited()
+    sync_session.commit()
+    asyncio.run(run_after_commit(db))
+    assert tag_cache.is_stale()
+    tag_cache.client.publish.assert_awaited_once()
+
+
+def test_tag_cache_skips_load_that_raced_an_invalidation():
+    cache = TagCache(MagicMock())
+    generation = cache.generation
+    cache.clear()
+
+    cache.load([SimpleNamespace(name="Fiction", uid=uuid.uuid4())], generation)
+
+    assert cache.is_stale()
+
+
+# Test GET /tags/facets
+@pytest.fixture
+def facet_cache(monkeypatch):
+    cache = TagFacetCache(MagicMock(hash_get=AsyncMock(return_value=None), hash_set=AsyncMock()))
+    monkeypatch.setattr("src.tags.services.tag_facet_cache", cache)
+    return cache
+
+
+def test_tag_facets_are_one_group_by_scoped_to_the_filtered_books(facet_cache):
+    fiction = uuid.uuid4()
+    service, db = _tag_service(tag_rows=[SimpleNamespace(uid=fiction, name="Fiction", book_count=3)])
+
+    facets = asyncio.run(service.get_tag_facets(q="dragons", filters=BookFilter(language="en")))
+
+    assert facets == [TagFacet(uid=fiction, name="Fiction", book_count=3)]
+    sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "GROUP BY book_tags.tag_id" in sql
+    assert "book_tags.book_id IN (SELECT books.bid" in sql
+    assert "books.language =" in sql and "websearch_to_tsquery" in sql
+    scope, payload = facet_cache.client.hash_set.await_args.args[1:3]
+    assert scope == TagFacetCache.scope(q="dragons", language="en") != "all"
+    assert json.loads(payload) == [{"uid": str(fiction), "name": "Fiction", "book_count": 3}]
+
+
+def test_tag_facets_are_served_from_cache(facet_cache):
+    fiction = uuid.uuid4()
+    facet_cache.client.hash_get.return_value = json.dumps([{"uid": str(fiction), "name": "Fiction", "book_count": 7}])
+    service, db = _tag_service()
+
+    facets = asyncio.run(service.get_tag_facets())
+
+    assert facets == [TagFacet(uid=fiction, name="Fiction", book_count=7)]
+    assert facet_cache.client.hash_get.await_args.args == (TagFacetCache.KEY, "all")
+    db.execute.assert_not_awaited()
+
+
+def test_tag_facets_route_passes_search_and_filters(client, mock_tag_service):
+    mock_tag_service.get_tag_facets.return_value = []
+
+    response = client.get(f"{tags_prefix}/facets", params={"q": "dragons", "author": "Tolkien"})
+
+    assert response.status_code == 200
+    assert response.json() == []
+    kwargs = mock_tag_service.get_tag_facets.await_args.kwargs
+    assert kwargs["q"] == "dragons" and kwargs["filters"].author == "Tolkien"
+
+
+# Test GET /tags/suggest
+def test_tag_cache_suggests_prefix_matches_by_usage():
+    tags = {name: SimpleNamespace(name=name, uid=uuid.uuid4()) for name in ("Fantasy", "Fable", "fiction", "Horror")}
+    cache = TagCache(MagicMock())
+    cache.load(tags.values())
+    cache.set_usage({tags["Fantasy"].uid: 5, tags["Fable"].uid: 9, tags["fiction"].uid: 9, tags["Horror"].uid: 20})
+
+    assert [entry.name for entry in cache.suggest("F", 2)] == ["Fable", "fiction"]
+    assert [(entry.name, entry.book_count) for entry in cache.suggest("fa", 10)] == [("Fable", 9), ("Fantasy", 5)]
+    assert cache.suggest("fz", 10) == []
+    assert cache.suggest("\U0010ffff", 10) == []  # no character after the last one to bisect up to
+
+    cache.clear()
+    cache.load(tags.values())  # reloading names keeps the counts until the next refresh
+    assert cache.suggest("h", 1)[0].book_count == 20
+
+
+def test_suggest_tags_loads_stale_names_once_without_counting_usage(monkeypatch):
+    cache = TagCache(MagicMock())
+    monkeypatch.setattr("src.tags.services.tag_cache", cache)
+    fiction = SimpleNamespace(name="Fiction", uid=uuid.uuid4(), created_at=None)
+    async def list_tags_query(statement):
+        await asyncio.sleep(0)  # a real query yields, letting the other request find the cache stale too
+        return MagicMock(scalars=MagicMock(return_value=MagicMock(all=MagicMock(return_value=[fiction]))))
+
+    db = MagicMock()
+    db.execute = AsyncMock(side_effect=list_tags_query)
+    service = TagService(db, MagicMock())
+
+    async def concurrent_suggestions():
+        return await asyncio.gather(service.suggest_tags("fic", 5), service.suggest_tags("f", 5))
+
+    assert asyncio.run(concurrent_suggestions()) == [[TagFacet(uid=fiction.uid, name="Fiction", book_count=0)]] * 2
+    db.execute.assert_awaited_once()  # one list_tags for both requests, no GROUP BY on the request path
+    assert "GROUP BY" not in str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+
+
+def test_refresh_tag_usage_reranks_suggestions(monkeypatch):
+    cache = TagCache(MagicMock())
+    monkeypatch.setattr("src.tags.services.tag_cache", cache)
+    fiction = SimpleNamespace(name="Fiction", uid=uuid.uuid4())
+    cache.load([fiction])
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=[(fiction.uid, 3)])))
+
+    asyncio.run(TagService(db, MagicMock()).refresh_tag_usage())
+
+    assert "GROUP BY book_tags.tag_id" in str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert cache.suggest("fic", 5)[0].book_count == 3
+
+
+def test_suggest_route_validates_prefix(client, mock_tag_service):
+    mock_tag_service.suggest_tags.return_value = []
+
+    assert client.get(f"{tags_prefix}/suggest", params={"prefix": ""}).status_code == 422
+    response = client.get(f"{tags_prefix}/suggest", params={"prefix": "fic", "limit": 5})
+
+    assert response.status_code == 200
+    mock_tag_service.suggest_tags.assert_awaited_once_with("fic", 5)
+
+
+def test_add_unknown_tags_route_lists_names(client, mock_tag_service):
+    mock_tag_service.add_tag_to_book.side_effect = TagNotFound(details={"tag_names": ["fantasy", "horror"]})
+
+    response = client.post(f"{tags_prefix}/book/{uuid.uuid4()}/tags", json={"tags": [{"name": "fantasy"}, {"name": "horror"}]})
+
+    assert response.status_code == 404
+    assert response.json()["details"] == {"tag_names": ["fantasy", "horror"]}
+    mock_tag_service.add_tag_to_book.side_effect = None